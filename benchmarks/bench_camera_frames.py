@@ -0,0 +1,57 @@
+"""
+Camera frame to pygame Surface: the old slicing path vs. SurfaceFramePath.
+
+The old path (frombuffer, drop alpha, reverse channels, swap axes,
+make_surface) is what CameraManager._parse_image did on every frame. Both
+are timed on the conversion, which runs in the sensor callback, and on the
+blit to the display, which runs in the render loop.
+
+    python -m benchmarks.bench_camera_frames --res 1280x720
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from benchmarks.timing import best_of
+from camera_frames import SurfaceFramePath
+
+
+def old_surface(raw_data, width, height):
+    array = np.frombuffer(raw_data, dtype=np.dtype("uint8"))
+    array = np.reshape(array, (height, width, 4))
+    array = array[:, :, :3]
+    array = array[:, :, ::-1]
+    return pygame.surfarray.make_surface(array.swapaxes(0, 1))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--res', default='640x360,1280x720,1920x1080', help='comma separated resolutions')
+    argparser.add_argument('--repeat', default=20, type=int, help='runs per measurement (best is kept)')
+    args = argparser.parse_args()
+
+    pygame.init()
+    frame_path = SurfaceFramePath()
+    rng = np.random.default_rng(0)
+    print('%-10s %-6s %14s %10s' % ('res', 'path', 'callback ms', 'blit ms'))
+    for res in args.res.split(','):
+        width, height = [int(x) for x in res.split('x')]
+        display = pygame.display.set_mode((width, height))
+        # CARLA hands the callback a memoryview of BGRA bytes
+        raw_data = memoryview(rng.integers(0, 256, width * height * 4, dtype=np.uint8).tobytes())
+        for name, convert in (('old', lambda: old_surface(raw_data, width, height)),
+                              ('new', lambda: frame_path.surface(raw_data, width, height)[0])):
+            surface = convert()
+            callback = best_of(convert, args.repeat)
+            blit = best_of(lambda: display.blit(surface, (0, 0)), args.repeat)
+            print('%-10s %-6s %14.3f %10.3f' % (res, name, callback * 1000, blit * 1000))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Recording camera frames: one PNG per frame vs. the FrameRecorder.
+
+Frames are submitted at --fps as a sensor delivers them. The PNG path saves
+each frame in the caller, as save_to_disk did in the sensor callback; the
+recorder path only copies it into shared memory. Reports the time spent per
+frame on the caller's side, the rate actually sustained, the recorder's
+stalls (submits that waited for the disk) and whether every frame reached it.
+
+    python -m benchmarks.bench_frame_recorder --res 1280x720 --fps 20 --frames 200
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from camera_frames import SurfaceFramePath
+from frame_recorder import FrameRecorder, FrameRecording
+
+
+def paced(frames, fps, record):
+    # calls record(n, frame) at `fps`; returns seconds per call and the rate sustained
+    period = 1.0 / fps
+    seconds = []
+    start = time.perf_counter()
+    for n, frame in enumerate(frames):
+        call = time.perf_counter()
+        record(n, frame)
+        seconds.append(time.perf_counter() - call)
+        delay = start + (n + 1) * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return np.array(seconds), len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--res', default='1280x720', help='frame resolution')
+    argparser.add_argument('--fps', default=20.0, type=float, help='sensor frame rate')
+    argparser.add_argument('--frames', default=200, type=int, help='frames recorded')
+    argparser.add_argument('--png-frames', default=20, type=int, help='frames saved as PNG (slow)')
+    argparser.add_argument('--dir', help='output directory (default: a temporary one)')
+    args = argparser.parse_args()
+
+    width, height = [int(x) for x in args.res.split('x')]
+    rng = np.random.default_rng(0)
+    # a few distinct frames, repeated
+    pool = [rng.integers(0, 256, width * height * 4, dtype=np.uint8) for _ in range(4)]
+    frames = [pool[n % len(pool)].data for n in range(args.frames)]
+    output = args.dir or tempfile.mkdtemp(prefix='bench_frame_recorder-')
+    print('%-9s %8s %12s %12s %9s %8s %8s' % ('path', 'frames', 'mean ms', 'max ms', 'fps', 'stalls', 'written'))
+    try:
+        pygame.init()
+        frame_path = SurfaceFramePath(buffers=1)
+        png_dir = os.path.join(output, 'png')
+        os.makedirs(png_dir, exist_ok=True)
+
+        def save_png(n, frame):
+            surface, _ = frame_path.surface(frame, width, height)
+            pygame.image.save(surface, os.path.join(png_dir, '%08d.png' % n))
+
+        seconds, fps = paced(frames[:args.png_frames], args.fps, save_png)
+        print('%-9s %8d %12.2f %12.2f %9.1f %8s %8d' % (
+            'png', len(seconds), 1000 * seconds.mean(), 1000 * seconds.max(), fps, '-', len(os.listdir(png_dir))))
+
+        path = os.path.join(output, 'recording')
+        recorder = FrameRecorder(path, width, height, fps=args.fps)
+        seconds, fps = paced(frames, args.fps, lambda n, frame: recorder.submit(n, frame, n / args.fps))
+        written = recorder.close()
+        assert written == len(FrameRecording(path)) == args.frames
+        print('%-9s %8d %12.2f %12.2f %9.1f %8d %8d' % (
+            'recorder', len(seconds), 1000 * seconds.mean(), 1000 * seconds.max(), fps, recorder.stalls, written))
+    finally:
+        pygame.quit()
+        if args.dir is None:
+            shutil.rmtree(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Per-tick fuel prediction latency against fleet size.
+
+Compares the old path (a fresh FuelConsumptionPredictor and a one-row predict
+per vehicle) with a single predict_batch call per tick.
+
+    python -m benchmarks.bench_fuel_prediction
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from models.registry import registry
+from models.fuel_consumption_predictor import FuelConsumptionPredictor
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'models', 'model_checkpoints', 'gradient_boosting_model.pkl')
+
+
+def time_tick(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--model', default=MODEL_PATH, help='path to the model checkpoint')
+    argparser.add_argument('--vehicles', default='1,10,100,300,1000', help='comma separated fleet sizes')
+    argparser.add_argument('--repeat', default=5, type=int, help='ticks timed per fleet size (best is kept)')
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    batch_predictor = FuelConsumptionPredictor(args.model)
+
+    print('%8s %14s %14s %9s' % ('vehicles', 'per-vehicle ms', 'batched ms', 'speedup'))
+    for n in [int(x) for x in args.vehicles.split(',')]:
+        distance = rng.uniform(0, 100, n)
+        speed = rng.uniform(0, 90, n)
+
+        def per_vehicle():
+            for d, s in zip(distance, speed):
+                # old behaviour: model reloaded for every vehicle
+                registry.clear()
+                FuelConsumptionPredictor(args.model).predict(d, s, 1, 1, 0, 1)
+
+        def batched():
+            batch_predictor.predict_batch(distance, speed, 1, 1, 0, 1)
+
+        # the per-vehicle path is slow, time it once for large fleets
+        old = time_tick(per_vehicle, 1 if n > 100 else args.repeat)
+        new = time_tick(batched, args.repeat)
+        print('%8d %14.2f %14.2f %8.1fx' % (n, old * 1000, new * 1000, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+scikit-learn predict vs. the level-by-level NumPy kernel in models/gbt_kernel.py.
+
+Both evaluate the fuel model checkpoint on the same random feature rows; the
+largest absolute difference between their predictions is reported as well.
+
+    python -m benchmarks.bench_gbt_kernel
+"""
+
+import argparse
+import warnings
+
+import joblib
+import numpy as np
+
+from benchmarks.timing import best_of
+from models.gbt_kernel import TreeEnsembleKernel
+from models.registry import MODELS_DIR
+
+
+def sklearn_predict(model, X):
+    # the model was fitted on a DataFrame, the feature-name warning is noise here
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        return model.predict(X)
+
+
+def random_features(rng, n):
+    # distance, speed and four one-hot pairs, as FuelConsumptionPredictor encodes them
+    flags = rng.integers(0, 2, (n, 4))
+    features = np.empty((n, 10), dtype=np.float64)
+    features[:, 0] = rng.uniform(0.0, 300.0, n)
+    features[:, 1] = rng.uniform(0.0, 120.0, n)
+    features[:, 2:10:2] = flags == 0
+    features[:, 3:10:2] = flags == 1
+    return features
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--model', default=MODELS_DIR + '/gradient_boosting_model.pkl', help='pickled model')
+    argparser.add_argument('--batches', default='1,64,1000,100000', help='comma separated batch sizes')
+    argparser.add_argument('--repeat', default=5, type=int, help='runs per measurement (best is kept)')
+    args = argparser.parse_args()
+
+    model = joblib.load(args.model)
+    kernel = TreeEnsembleKernel.from_model(model)
+    rng = np.random.default_rng(0)
+
+    print('%8s %12s %12s %9s %12s' % ('batch', 'sklearn ms', 'kernel ms', 'speedup', 'max |diff|'))
+    for n in [int(x) for x in args.batches.split(',')]:
+        X = random_features(rng, n)
+        diff = np.abs(sklearn_predict(model, X) - kernel.predict(X)).max()
+        sklearn_time = best_of(lambda: sklearn_predict(model, X), args.repeat)
+        kernel_time = best_of(lambda: kernel.predict(X), args.repeat)
+        print('%8d %12.3f %12.3f %8.1fx %12.2g' % (
+            n, sklearn_time * 1000, kernel_time * 1000, sklearn_time / kernel_time, diff))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Lidar bird's-eye view: the old per-sweep code vs. LidarRasterizer.
+
+The old path (np.zeros image, np.fabs, fancy-index write, make_surface) is
+what CameraManager did for every lidar sweep. Points are spread over a disc
+of `lidar_range`, the only input the old code handles without indexing out
+of the image. Times cover raw bytes to Surface.
+
+    python -m benchmarks.bench_lidar_raster --points 100000,1000000
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from benchmarks.timing import best_of
+from lidar_raster import LidarRasterizer
+
+
+def old_surface(raw_data, dim, lidar_range):
+    points = np.frombuffer(raw_data, dtype=np.dtype('f4'))
+    points = np.reshape(points, (int(points.shape[0] / 4), 4))
+    lidar_data = np.array(points[:, :2])
+    lidar_data *= min(dim) / (2.0 * lidar_range)
+    lidar_data += (0.5 * dim[0], 0.5 * dim[1])
+    lidar_data = np.fabs(lidar_data)
+    lidar_data = lidar_data.astype(np.int32)
+    lidar_data = np.reshape(lidar_data, (-1, 2))
+    lidar_img = np.zeros((dim[0], dim[1], 3), dtype=np.uint8)
+    lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
+    return pygame.surfarray.make_surface(lidar_img)
+
+
+def sweep(n, lidar_range, rng):
+    radius = lidar_range * np.sqrt(rng.uniform(0.0, 0.999, n))
+    angle = rng.uniform(0.0, 2.0 * np.pi, n)
+    points = np.empty((n, 4), dtype=np.float32)
+    points[:, 0] = radius * np.cos(angle)
+    points[:, 1] = radius * np.sin(angle)
+    points[:, 2] = rng.uniform(-2.5, 1.0, n)
+    points[:, 3] = rng.uniform(0.0, 1.0, n)
+    return points.tobytes()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--res', default='1280x720', help='image resolution')
+    argparser.add_argument('--points', default='100000,300000,1000000', help='comma separated points per sweep')
+    argparser.add_argument('--range', default=50.0, type=float, help='lidar range in meters')
+    argparser.add_argument('--repeat', default=10, type=int, help='runs per measurement (best is kept)')
+    args = argparser.parse_args()
+
+    pygame.init()
+    dim = tuple(int(x) for x in args.res.split('x'))
+    rng = np.random.default_rng(0)
+    paths = [('old', None, 0.0), ('white', 'white', 0.0), ('intensity', 'intensity', 0.0),
+             ('height', 'height', 0.0), ('decay', 'intensity', 0.6)]
+    print('%-9s %-10s %10s' % ('points', 'path', 'ms/sweep'))
+    for n in [int(x) for x in args.points.split(',')]:
+        raw_data = sweep(n, args.range, rng)
+        for name, color, decay in paths:
+            if color is None:
+                convert = lambda: old_surface(raw_data, dim, args.range)
+            else:
+                rasterizer = LidarRasterizer(dim[0], dim[1], args.range, color, decay)
+                convert = lambda: rasterizer.sweep_surface(raw_data)
+            print('%-9d %-10s %10.2f' % (n, name, 1000 * best_of(convert, args.repeat)))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Scalar vs. array throughput of the physics helpers in utils.py.
+
+The scalar functions are called once per vehicle, the array versions once
+per fleet.
+
+    python -m benchmarks.bench_physics_kernels
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.timing import best_of
+from utils import (calculate_engine_rpm, calculate_engine_rpm_array, calculate_fuel_consumption,
+                   calculate_fuel_consumption_array, calculate_pressure, calculate_pressure_array)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--vehicles', default='1,10,100,1000,10000', help='comma separated fleet sizes')
+    argparser.add_argument('--repeat', default=5, type=int, help='runs per measurement (best is kept)')
+    args = argparser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print('%-18s %8s %16s %16s %9s' % ('kernel', 'vehicles', 'scalar veh/s', 'array veh/s', 'speedup'))
+    for n in [int(x) for x in args.vehicles.split(',')]:
+        gear = rng.integers(-1, 6, n)
+        gear_ratio = rng.uniform(0.7, 4.0, n)
+        final_ratio = rng.uniform(3.0, 4.5, n)
+        speed = rng.uniform(0.0, 30.0, n)
+        radius = rng.uniform(0.3, 0.4, n)
+        mass = rng.uniform(1000.0, 2500.0, n)
+        acceleration = rng.uniform(0.0, 3.0, n)
+        rpm = calculate_engine_rpm_array(gear, gear_ratio, final_ratio, speed, radius)
+        distance = speed * 0.05
+        drag = rng.uniform(0.2, 0.35, n)
+        moi = np.ones(n)
+        uptime = rng.integers(0, 3600, n)
+        stopped_for = rng.integers(0, 1800, n)
+        pressure = np.full(n, 32.0)
+
+        # the scalar calls get Python floats, as they did in the per-vehicle loop
+        g, gr, fr, sp, ra = gear.tolist(), gear_ratio.tolist(), final_ratio.tolist(), speed.tolist(), radius.tolist()
+        ma, ac, rp, di, dr, mo = mass.tolist(), acceleration.tolist(), rpm.tolist(), distance.tolist(), drag.tolist(), moi.tolist()
+        up, st, pr = uptime.tolist(), stopped_for.tolist(), pressure.tolist()
+
+        kernels = [
+            ('engine_rpm',
+             lambda: [calculate_engine_rpm(*a) for a in zip(g, gr, fr, sp, ra)],
+             lambda: calculate_engine_rpm_array(gear, gear_ratio, final_ratio, speed, radius)),
+            ('fuel_consumption',
+             lambda: [calculate_fuel_consumption(*a) for a in zip(ma, ac, sp, rp, di, dr, mo)],
+             lambda: calculate_fuel_consumption_array(mass, acceleration, speed, rpm, distance, drag, moi)),
+            ('pressure',
+             lambda: [calculate_pressure(*a) for a in zip(pr, up, st)],
+             lambda: calculate_pressure_array(pressure, uptime, stopped_for)),
+        ]
+        for name, scalar, vector in kernels:
+            scalar_time = best_of(scalar, args.repeat)
+            vector_time = best_of(vector, args.repeat)
+            print('%-18s %8d %16.0f %16.0f %8.1fx' % (
+                name, n, n / scalar_time, n / vector_time, scalar_time / vector_time))
+
+
+if __name__ == '__main__':
+    main()
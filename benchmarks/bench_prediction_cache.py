@@ -0,0 +1,65 @@
+"""
+Fuel predictions with and without a PredictionCache.
+
+A fleet drives for a number of ticks with speeds doing a random walk and
+trip distances growing with them; every tick predicts for every vehicle,
+one call per vehicle (predict) and one call per tick (predict_batch).
+Reports time per tick and the cache's hit rate and evictions.
+
+    python -m benchmarks.bench_prediction_cache --vehicles 100 --ticks 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from models.fuel_consumption_predictor import FuelConsumptionPredictor
+from models.prediction_cache import PredictionCache
+
+
+def drive(vehicles, ticks, seed=0):
+    # per tick (distance km, speed km/h) of every vehicle
+    rng = np.random.default_rng(seed)
+    speed = rng.uniform(0.0, 90.0, vehicles)
+    distance = rng.uniform(0.0, 50.0, vehicles)
+    for _ in range(ticks):
+        speed = np.clip(speed + rng.normal(0.0, 2.0, vehicles), 0.0, 130.0)
+        distance = distance + speed / 3600.0
+        yield distance, speed
+
+
+def run(predictor, vehicles, ticks, batched):
+    start = time.perf_counter()
+    for distance, speed in drive(vehicles, ticks):
+        if batched:
+            predictor.predict_batch(distance, speed, 1, 1, 0, 1)
+        else:
+            for d, s in zip(distance.tolist(), speed.tolist()):
+                predictor.predict(d, s, 1, 1, 0, 1)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--vehicles', default=100, type=int, help='fleet size')
+    argparser.add_argument('--ticks', default=200, type=int, help='ticks simulated')
+    argparser.add_argument('--capacity', default=4096, type=int, help='cache entries')
+    argparser.add_argument('--distance-step', default=1.0, type=float, help='distance quantization in km')
+    argparser.add_argument('--speed-step', default=1.0, type=float, help='speed quantization in km/h')
+    args = argparser.parse_args()
+
+    print('%-10s %-8s %12s %9s %10s' % ('calls', 'policy', 'ms/tick', 'hit rate', 'evictions'))
+    for batched in (False, True):
+        calls = 'batched' if batched else 'per-vehicle'
+        uncached = run(FuelConsumptionPredictor(), args.vehicles, args.ticks, batched)
+        print('%-10s %-8s %12.3f %9s %10s' % (calls, '-', uncached * 1000, '-', '-'))
+        for policy in ('lru', 'lfu'):
+            cache = PredictionCache(args.capacity, args.distance_step, args.speed_step, policy)
+            cached = run(FuelConsumptionPredictor(cache=cache), args.vehicles, args.ticks, batched)
+            print('%-10s %-8s %12.3f %8.1f%% %10d' % (
+                calls, policy, cached * 1000, 100 * cache.hit_rate, cache.evictions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Radar sweep processing: the old per-detection loop vs. radar_points.
+
+The old loop (one rotation, one color and one debug.draw_point per
+detection) is timed with a debug helper that only counts calls, so the
+numbers leave out the RPC cost that real draw_point calls add on top. The
+new path decodes the sweep in bulk and either draws at most --max-points
+(debug) or renders the client-side overlay (no calls at all). Positions and
+colors of both are checked to agree.
+
+    python -m benchmarks.bench_radar --detections 500,5000
+"""
+
+import argparse
+import math
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from benchmarks.timing import best_of
+from radar_points import RadarOverlay, decode_radar, radar_world_points, velocity_colors
+
+VELOCITY_RANGE = 7.5
+
+
+class CountingDebug():
+    def __init__(self):
+        self.calls = 0
+
+    def draw_point(self, location, size=0.1, color=None, life_time=-1.0, persistent_lines=True):
+        self.calls += 1
+
+
+def forward(pitch, yaw, depth):
+    # carla.Rotation(pitch, yaw, roll).transform(carla.Vector3D(x=depth))
+    pitch = math.radians(pitch)
+    yaw = math.radians(yaw)
+    return (depth * math.cos(pitch) * math.cos(yaw), depth * math.cos(pitch) * math.sin(yaw),
+            depth * math.sin(pitch))
+
+
+def old_sweep(detections, transform, debug):
+    current_rot = transform.rotation
+    drawn = []
+    for velocity, azimuth, altitude, depth in detections:
+        azi = math.degrees(azimuth)
+        alt = math.degrees(altitude)
+        fw_vec = forward(current_rot.pitch + alt, current_rot.yaw + azi, depth - 0.25)
+
+        def clamp(min_v, max_v, value):
+            return max(min_v, min(value, max_v))
+
+        norm_velocity = velocity / VELOCITY_RANGE
+        r = int(clamp(0.0, 1.0, 1.0 - norm_velocity) * 255.0)
+        g = int(clamp(0.0, 1.0, 1.0 - abs(norm_velocity)) * 255.0)
+        b = int(abs(clamp(- 1.0, 0.0, - 1.0 - norm_velocity)) * 255.0)
+        location = transform.location
+        point = (location.x + fw_vec[0], location.y + fw_vec[1], location.z + fw_vec[2])
+        debug.draw_point(point, size=0.075, life_time=0.06, persistent_lines=False, color=(r, g, b))
+        drawn.append(point + (r, g, b))
+    return drawn
+
+
+def new_sweep(raw_data, transform, debug, max_points):
+    points = decode_radar(raw_data)
+    colors = velocity_colors(points[:, 0], VELOCITY_RANGE)
+    if len(points) > max_points:
+        keep = np.linspace(0, len(points) - 1, max_points).astype(np.intp)
+        points = points[keep]
+        colors = colors[keep]
+    locations = radar_world_points(points, transform)
+    for location, color in zip(locations.tolist(), colors.tolist()):
+        debug.draw_point(location, size=0.075, life_time=0.06, persistent_lines=False, color=color)
+    return locations, colors
+
+
+def overlay_sweep(raw_data, overlay):
+    points = decode_radar(raw_data)
+    overlay.draw(points.copy(), velocity_colors(points[:, 0], VELOCITY_RANGE))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--detections', default='500,1500,5000', help='comma separated detections per sweep')
+    argparser.add_argument('--max-points', default=200, type=int, help='debug points drawn per sweep')
+    argparser.add_argument('--repeat', default=10, type=int, help='runs per measurement (best is kept)')
+    args = argparser.parse_args()
+
+    pygame.init()
+    rng = np.random.default_rng(0)
+    transform = SimpleNamespace(location=SimpleNamespace(x=10.0, y=-4.0, z=1.5),
+                                rotation=SimpleNamespace(pitch=5.0, yaw=30.0, roll=0.0))
+    overlay = RadarOverlay(200, 100.0)
+    print('%-11s %-8s %10s %8s' % ('detections', 'path', 'ms/sweep', 'draws'))
+    for n in [int(x) for x in args.detections.split(',')]:
+        detections = np.empty((n, 4), dtype=np.float32)
+        detections[:, 0] = rng.uniform(-10.0, 10.0, n)
+        detections[:, 1] = np.radians(rng.uniform(-17.5, 17.5, n))
+        detections[:, 2] = np.radians(rng.uniform(-10.0, 10.0, n))
+        detections[:, 3] = rng.uniform(1.0, 100.0, n)
+        raw_data = detections.tobytes()
+
+        old = np.array(old_sweep(detections.tolist(), transform, CountingDebug()))
+        locations, colors = new_sweep(raw_data, transform, CountingDebug(), n)
+        assert np.allclose(old[:, :3], locations, atol=1e-3)
+        assert np.abs(old[:, 3:] - colors).max() <= 1
+
+        for name, sweep in (('old', lambda debug: old_sweep(detections.tolist(), transform, debug)),
+                            ('debug', lambda debug: new_sweep(raw_data, transform, debug, args.max_points)),
+                            ('overlay', lambda debug: overlay_sweep(raw_data, overlay))):
+            debug = CountingDebug()
+            seconds = best_of(lambda: sweep(debug), args.repeat)
+            print('%-11d %-8s %10.3f %8d' % (n, name, 1000 * seconds, debug.calls // args.repeat))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
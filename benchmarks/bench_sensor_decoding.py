@@ -0,0 +1,120 @@
+"""
+Camera frames decoded in the sensor callback vs. handed to a SensorDecoder.
+
+A fake sensor delivers BGRA frames at --fps from its own thread, as CARLA's
+callback thread does, while the main thread renders at --render-fps. Inline
+decoding runs SurfaceFramePath in the callback; the decoder path only submits
+the frame. Reports the time spent in the callback, the rate the sensor
+actually delivered at (a slow callback holds it back), the age in frames of
+what the render loop shows, and the decoder's dropped / late counters.
+
+    python -m benchmarks.bench_sensor_decoding --res 1280x720 --fps 20
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from camera_frames import SurfaceFramePath
+from sensor_decoding import SensorDecoder
+
+
+def sensor(frames, fps, callback, stop, elapsed):
+    period = 1.0 / fps
+    start = time.perf_counter()
+    for n, raw_data in enumerate(frames):
+        if stop.is_set():
+            return
+        callback(n, raw_data)
+        delay = start + (n + 1) * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed.append(time.perf_counter() - start)
+    stop.set()
+
+
+def run(mode, frames, width, height, fps, render_fps, extra_ms):
+    display = pygame.display.set_mode((width, height))
+    frame_path = SurfaceFramePath()
+    latest = {'frame': -1, 'surface': None}
+    received = [-1]
+    callback_seconds = []
+
+    def decode(frame):
+        n, raw_data = frame
+        surface = frame_path.surface(raw_data, width, height)[0]
+        # stands in for lidar / DVS / color conversion work
+        time.sleep(extra_ms / 1000.0)
+        return surface
+
+    decoder = channel = None
+    if mode == 'decoder':
+        decoder = SensorDecoder(workers=2)
+        channel = decoder.channel('camera', decode)
+
+    def callback(n, raw_data):
+        start = time.perf_counter()
+        received[0] = n
+        if channel is not None:
+            channel.submit(n, (n, raw_data))
+        else:
+            latest['surface'] = decode((n, raw_data))
+            latest['frame'] = n
+        callback_seconds.append(time.perf_counter() - start)
+
+    stop = threading.Event()
+    elapsed = []
+    thread = threading.Thread(target=sensor, args=(frames, fps, callback, stop, elapsed))
+    thread.start()
+    ages = []
+    while not stop.is_set():
+        if channel is not None:
+            surface, shown = channel.latest, channel.latest_frame
+        else:
+            surface, shown = latest['surface'], latest['frame']
+        if surface is not None:
+            display.blit(surface, (0, 0))
+            ages.append(received[0] - shown)
+        time.sleep(1.0 / render_fps)
+    thread.join()
+    counters = {}
+    if decoder is not None:
+        decoder.close()
+        counters = channel.counters()
+    delivered = len(frames) / elapsed[0]
+    return 1000 * np.mean(callback_seconds), delivered, np.mean(ages) if ages else float('nan'), counters
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--res', default='1280x720', help='frame resolution')
+    argparser.add_argument('--fps', default=20.0, type=float, help='sensor frame rate')
+    argparser.add_argument('--render-fps', default=60.0, type=float, help='render loop rate')
+    argparser.add_argument('--frames', default=100, type=int, help='frames delivered')
+    argparser.add_argument('--extra-ms', default='0,40,80', help='comma separated extra decode work per frame')
+    args = argparser.parse_args()
+
+    pygame.init()
+    width, height = [int(x) for x in args.res.split('x')]
+    rng = np.random.default_rng(0)
+    frames = [memoryview(rng.integers(0, 256, width * height * 4, dtype=np.uint8).tobytes())] * args.frames
+    print('%-8s %-8s %12s %11s %8s %8s %6s' % (
+        'extra', 'mode', 'callback ms', 'sensor fps', 'age', 'dropped', 'late'))
+    for extra_ms in [float(x) for x in args.extra_ms.split(',')]:
+        for mode in ('inline', 'decoder'):
+            callback_ms, delivered, age, counters = run(
+                mode, frames, width, height, args.fps, args.render_fps, extra_ms)
+            print('%-8s %-8s %12.3f %11.1f %8.2f %8s %6s' % (
+                '%.0f ms' % extra_ms, mode, callback_ms, delivered, age,
+                counters.get('dropped', '-'), counters.get('late', '-')))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
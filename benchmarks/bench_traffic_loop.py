@@ -0,0 +1,71 @@
+"""
+Throughput of the GenerateTraffic telemetry loop against the headless CARLA stand-in.
+
+Runs start_traffic offline (no simulator, no GPU) at several fleet sizes with
+a configurable per-RPC latency and reports vehicle-ticks per second,
+simulator round-trips per tick and, when pipelined, the wall time per tick
+saved against the serial ticks the pipeline times along the way (- when the
+run is too short to include one).
+
+    python -m benchmarks.bench_traffic_loop --vehicles 10,100,1000 --latency 0.0001 --pipeline-depth 2
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+STUBS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stubs')
+sys.path.insert(0, STUBS)
+
+import carla
+
+from generate_traffic import GenerateTraffic
+from run_control import RunLimits
+
+MODEL_PATH = os.path.join(os.path.dirname(STUBS), 'models', 'model_checkpoints', 'gradient_boosting_model.pkl')
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--vehicles', default='10,100,1000', help='comma separated fleet sizes')
+    argparser.add_argument('--ticks', default=100, type=int, help='ticks per run (default: 100)')
+    argparser.add_argument('--walkers', default=0, type=int, help='number of walkers (default: 0)')
+    argparser.add_argument('--latency', default=0.0, type=float, help='seconds slept per simulated RPC')
+    argparser.add_argument('--pipeline-depth', default=0, type=int,
+                           help='frames processed while the next ones are ticked (default: 0, serial)')
+    argparser.add_argument('--profile', metavar='PATH',
+                           help='log per-phase percentiles and dump a Chrome trace (or *.speedscope.json) to PATH')
+    argparser.add_argument('--model', default=MODEL_PATH, help='path to the model checkpoint')
+    args = argparser.parse_args()
+
+    if args.profile:
+        logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+        logging.getLogger().addFilter(lambda record: record.getMessage().startswith('tick profile'))
+    else:
+        logging.disable(logging.INFO)
+    carla.set_rpc_latency(args.latency)
+
+    print('%8s %8s %10s %16s %10s %14s' % ('vehicles', 'ticks', 'seconds', 'vehicle-ticks/s', 'rpc/tick',
+                                          'saved ms/tick'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(x) for x in args.vehicles.split(',')]:
+            traffic = GenerateTraffic(number_of_vehicles=n, number_of_walkers=args.walkers, seed=0,
+                                      telemetry_path=os.path.join(tmp, 'telemetry.csv'),
+                                      keep_telemetry=False, log_every=0, model_path=args.model,
+                                      pipeline_depth=args.pipeline_depth, profile=args.profile,
+                                      run_limits=RunLimits(ticks=args.ticks))
+            start = time.perf_counter()
+            traffic.start_traffic()
+            elapsed = time.perf_counter() - start
+            ticks = len(traffic.rpc_counter.per_tick)
+            pipeline = traffic.tick_pipeline
+            saved = '%.2f' % (1000 * pipeline.saved_seconds_per_tick) if pipeline.calibrated else '-'
+            print('%8d %8d %10.2f %16.0f %10.1f %14s' % (
+                n, ticks, elapsed, n * ticks / elapsed, traffic.rpc_counter.mean, saved))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+import time
+
+
+def best_of(fn, repeat):
+    # seconds of the fastest of `repeat` calls of fn()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,102 @@
+import sys
+import time
+
+import numpy as np
+import pygame
+
+# 32-bit surface masks whose pixels are laid out in memory as CARLA's BGRA,
+# with the alpha byte ignored (little-endian byte order)
+BGRX_MASKS = (0xFF0000, 0xFF00, 0xFF, 0)
+BGRX_NATIVE = sys.byteorder == 'little'
+
+
+class FrameStats():
+    """Frames decoded for a sensor, full-frame copies made and time spent."""
+
+    def __init__(self):
+        self.frames = 0
+        self.copies = 0
+        self.decode_seconds = 0.0
+        self.last_decode_seconds = 0.0
+
+    @property
+    def copies_per_frame(self):
+        return self.copies / self.frames if self.frames else 0.0
+
+    @property
+    def mean_decode_ms(self):
+        return 1000.0 * self.decode_seconds / self.frames if self.frames else 0.0
+
+    def add_frame(self, seconds, copies=0):
+        self.frames += 1
+        self.copies += copies
+        self.decode_seconds += seconds
+        self.last_decode_seconds = seconds
+
+    def timed(self):
+        return _Timer(self)
+
+
+class _Timer():
+    def __init__(self, stats):
+        self.stats = stats
+        self.copies = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_frame(time.perf_counter() - self.start, self.copies)
+
+
+class SurfaceFramePath():
+    """
+    Turns BGRA sensor images into pygame Surfaces with a single copy.
+
+    Each resolution has preallocated staging Surfaces whose pixel format is
+    BGRA with the alpha byte ignored, so the image bytes are written into the
+    Surface's pixels as they are: no channel slicing, reversing, transposing
+    or per-pixel alpha blending on blit. Wrapping the image's memory with
+    frombuffer instead gives a per-pixel alpha Surface that is much slower to
+    blit, which is why the one copy stays. The `buffers` staging Surfaces are
+    used in turn, so the one being displayed is not overwritten by the frames
+    that follow it.
+    """
+
+    def __init__(self, buffers=3):
+        self.buffers = buffers
+        self.staging = {}
+        self.next = {}
+
+    def _staging(self, width, height):
+        size = (width, height)
+        ring = self.staging.get(size)
+        if ring is None:
+            ring = [pygame.Surface(size, 0, 32, BGRX_MASKS) for _ in range(self.buffers)]
+            self.staging[size] = ring
+            self.next[size] = 0
+        n = self.next[size]
+        self.next[size] = (n + 1) % self.buffers
+        return ring[n]
+
+    def surface(self, raw_data, width, height):
+        """A Surface of the BGRA bytes in `raw_data`; returns (surface, copies made)."""
+        surface = self._staging(width, height)
+        if BGRX_NATIVE and surface.get_pitch() == 4 * width:
+            # the view locks the Surface, it must be gone before the Surface is blitted
+            view = surface.get_view('1')
+            np.asarray(view).view(np.uint8)[:] = np.frombuffer(raw_data, dtype=np.uint8)
+            del view
+            return surface, 1
+        # padded rows or a big-endian host: copy the channels one by one
+        pixels = pygame.surfarray.pixels3d(surface)
+        source = np.frombuffer(raw_data, dtype=np.uint8).reshape(height, width, 4).swapaxes(0, 1)
+        pixels[:, :, 0] = source[:, :, 2]
+        pixels[:, :, 1] = source[:, :, 1]
+        pixels[:, :, 2] = source[:, :, 0]
+        del pixels
+        return surface, 1
+
+    def image_surface(self, image):
+        return self.surface(image.raw_data, image.width, image.height)
@@ -0,0 +1,102 @@
+import numpy as np
+
+# points of the resampled torque curve, evenly spaced over [0, max_rpm]
+TORQUE_CURVE_SAMPLES = 32
+
+
+class DrivetrainTable():
+    """
+    Drivetrain constants per blueprint, built once at spawn.
+
+    Each blueprint gets a row in a set of NumPy arrays (gear ratios padded to
+    the largest gearbox, final ratio, rolling radius, resampled torque
+    curve...), and each actor maps to the row of its blueprint, so per-tick
+    lookups for the whole fleet are single fancy-indexing operations.
+    """
+
+    def __init__(self, torque_curve_samples=TORQUE_CURVE_SAMPLES):
+        self.torque_curve_samples = torque_curve_samples
+        self.blueprint_index = {}
+        self.actor_rows = {}
+        self._physics = []
+        self._dirty = True
+
+    def __len__(self):
+        return len(self.blueprint_index)
+
+    def __contains__(self, actor_id):
+        return actor_id in self.actor_rows
+
+    def has_blueprint(self, type_id):
+        return type_id in self.blueprint_index
+
+    def register(self, actor_id, type_id, physics=None):
+        # physics (a VehiclePhysicsControl) is only needed the first time a blueprint is seen
+        row = self.blueprint_index.get(type_id)
+        if row is None:
+            if physics is None:
+                raise ValueError('no physics control given for new blueprint %r' % type_id)
+            row = len(self._physics)
+            self.blueprint_index[type_id] = row
+            self._physics.append(physics)
+            self._dirty = True
+        self.actor_rows[actor_id] = row
+        return row
+
+    def _build(self):
+        physics = self._physics
+        blueprints = len(physics)
+        # column g holds forward_gears[g]; gears past the end of a gearbox fall
+        # back to the first gear, like the IndexError fallback they replace
+        max_gears = max([len(p.forward_gears) for p in physics] + [1])
+        self.gear_ratios = np.empty((blueprints, max_gears + 1), dtype=np.float64)
+        self.final_ratio = np.empty(blueprints, dtype=np.float64)
+        self.rolling_radius = np.empty(blueprints, dtype=np.float64)
+        self.max_rpm = np.empty(blueprints, dtype=np.float64)
+        self.mass = np.empty(blueprints, dtype=np.float64)
+        self.drag_coefficient = np.empty(blueprints, dtype=np.float64)
+        self.moi = np.empty(blueprints, dtype=np.float64)
+        self.torque_curve = np.empty((blueprints, self.torque_curve_samples), dtype=np.float64)
+        for row, p in enumerate(physics):
+            ratios = [gear.ratio for gear in p.forward_gears]
+            self.gear_ratios[row, :] = ratios[0] if ratios else 0.0
+            self.gear_ratios[row, :len(ratios)] = ratios
+            self.final_ratio[row] = p.final_ratio
+            self.rolling_radius[row] = p.wheels[0].radius / 100
+            self.max_rpm[row] = p.max_rpm
+            self.mass[row] = p.mass
+            self.drag_coefficient[row] = p.drag_coefficient
+            self.moi[row] = p.moi
+            curve = np.array([(v.x, v.y) for v in p.torque_curve], dtype=np.float64).reshape(-1, 2)
+            curve = curve[np.argsort(curve[:, 0], kind='stable')]
+            grid = np.linspace(0.0, p.max_rpm, self.torque_curve_samples)
+            self.torque_curve[row] = np.interp(grid, curve[:, 0], curve[:, 1]) if len(curve) else 0.0
+        self._dirty = False
+
+    def rows(self, actor_ids):
+        if self._dirty:
+            self._build()
+        return np.fromiter((self.actor_rows[x] for x in actor_ids), dtype=np.intp, count=len(actor_ids))
+
+    def gear_ratio(self, rows, gears):
+        gears = np.clip(np.asarray(gears, dtype=np.intp), 0, self.gear_ratios.shape[1] - 1)
+        return self.gear_ratios[rows, gears]
+
+    def engine_torque(self, rows, rpm, throttle=1.0):
+        """
+        Engine torque in Nm for each vehicle, interpolated linearly on its
+        blueprint's resampled torque curve like np.interp (rpm beyond the
+        curve clamps to its ends) and scaled by throttle.
+        """
+        samples = self.torque_curve_samples - 1
+        position = np.clip(np.asarray(rpm, dtype=np.float64) / self.max_rpm[rows] * samples, 0, samples)
+        low = np.minimum(position.astype(np.intp), samples - 1)
+        weight = position - low
+        curve = self.torque_curve
+        torque = curve[rows, low] * (1.0 - weight) + curve[rows, low + 1] * weight
+        return torque * throttle
+
+
+def calculate_engine_power(torque, rpm):
+    # torque in Nm, rpm in revolutions per minute, power in kW
+    return np.asarray(torque) * np.asarray(rpm) * (2 * np.pi / 60) / 1000
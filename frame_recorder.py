@@ -0,0 +1,268 @@
+"""
+Camera frame recordings written by a separate process.
+
+A recording is a directory of raw BGRA frames:
+
+    meta.json         width, height, frames per chunk, fps, frame count
+    index.bin         one INDEX_DTYPE record per frame, in recording order
+    chunk-00000.raw   `frames_per_chunk` frames of height*width*4 bytes each
+    chunk-00001.raw   ...
+
+Chunks are plain frame arrays, so FrameRecording memory-maps them without
+decoding anything. FrameRecorder copies each frame into a shared-memory slot
+and a writer process appends it to the current chunk; when all slots are
+waiting to be written it blocks instead of dropping the frame.
+
+Recordings are exported offline to PNG files or, with ffmpeg, an MP4:
+
+    python -m frame_recorder export _out/recording-20240101-120000 --png frames/
+    python -m frame_recorder export _out/recording-20240101-120000 --mp4 drive.mp4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+RECORDING_FORMAT = 'bgra-chunks-v1'
+INDEX_DTYPE = np.dtype([('frame', '<i8'), ('timestamp', '<f8'), ('chunk', '<i4'), ('position', '<i4')])
+
+
+def chunk_path(path, chunk):
+    return os.path.join(path, 'chunk-%05d.raw' % chunk)
+
+
+def _write_meta(path, meta):
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def _writer(path, meta, memory_name, slot_size, pending, free):
+    # runs in the writer process: frames arrive as slot numbers in `pending`,
+    # slots go back through `free` once their frame is on disk
+    memory = shared_memory.SharedMemory(name=memory_name)
+    index = open(os.path.join(path, 'index.bin'), 'ab')
+    chunk = None
+    written = 0
+    error = None
+    try:
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            slot, frame, timestamp = item
+            if error is None:
+                try:
+                    position = written % meta['frames_per_chunk']
+                    if position == 0:
+                        if chunk is not None:
+                            chunk.close()
+                            index.flush()
+                        chunk = open(chunk_path(path, written // meta['frames_per_chunk']), 'wb')
+                    chunk.write(memory.buf[slot * slot_size:(slot + 1) * slot_size])
+                    record = np.array([(frame, timestamp, written // meta['frames_per_chunk'], position)],
+                                      dtype=INDEX_DTYPE)
+                    index.write(record.tobytes())
+                    written += 1
+                except Exception as e:
+                    error = '%s: %s' % (type(e).__name__, e)
+            free.put(slot)
+    finally:
+        if chunk is not None:
+            chunk.close()
+        index.close()
+        memory.close()
+        meta['frames'] = written
+        _write_meta(path, meta)
+        free.put(('closed', written, error))
+
+
+class FrameRecorder():
+    """
+    Records BGRA frames of a fixed size through a writer process.
+
+    submit() copies the frame into one of `slots` shared-memory slots and
+    returns; the copy is the only work done on the caller's thread. When every
+    slot is still waiting for the disk, submit() blocks until one is free, so
+    a slow disk throttles the sensor rather than losing frames. `stalls`
+    counts the submits that had to wait.
+    """
+
+    def __init__(self, path, width, height, slots=32, frames_per_chunk=200, fps=20.0):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.slot_size = width * height * 4
+        os.makedirs(path, exist_ok=True)
+        self.meta = {'format': RECORDING_FORMAT, 'width': width, 'height': height, 'pixel': 'bgra',
+                     'frames_per_chunk': frames_per_chunk, 'fps': fps, 'frames': 0}
+        _write_meta(path, self.meta)
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * self.slot_size)
+        self.frames = np.ndarray((slots, self.slot_size), dtype=np.uint8, buffer=self.memory.buf)
+        # not forked: the parent runs the CARLA client's and pygame's threads
+        context = multiprocessing.get_context('spawn')
+        self.pending = context.Queue()
+        self.free = context.Queue()
+        self.free_slots = list(range(slots))
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.stalls = 0
+        self.rejected = 0
+        self.written = None
+        self.error = None
+        self.process = context.Process(
+            target=_writer, name='frame-recorder',
+            args=(path, self.meta, self.memory.name, self.slot_size, self.pending, self.free), daemon=True)
+        self.process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _take_slot(self):
+        while True:
+            try:
+                self.free_slots.append(self.free.get_nowait())
+            except queue.Empty:
+                break
+        if not self.free_slots:
+            self.stalls += 1
+            self.free_slots.append(self._get_free())
+        return self.free_slots.pop()
+
+    def _get_free(self):
+        while True:
+            try:
+                return self.free.get(timeout=1.0)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError('frame recorder process exited with %s' % self.process.exitcode)
+
+    def submit(self, frame, raw_data, timestamp=0.0):
+        """Queues one frame; False if it does not have the recording's size or the recorder is closed."""
+        with self.lock:
+            if self.written is not None:
+                return False
+            source = np.frombuffer(raw_data, dtype=np.uint8)
+            if len(source) != self.slot_size:
+                self.rejected += 1
+                return False
+            slot = self._take_slot()
+            self.frames[slot] = source
+            self.pending.put((slot, frame, timestamp))
+            self.submitted += 1
+            return True
+
+    def submit_image(self, image):
+        return self.submit(image.frame, image.raw_data, image.timestamp)
+
+    def close(self):
+        """Waits for every queued frame to be written; returns the frames written."""
+        with self.lock:
+            if self.written is not None:
+                return self.written
+            self.pending.put(None)
+            while True:
+                item = self._get_free()
+                if isinstance(item, tuple):
+                    _, self.written, self.error = item
+                    break
+            self.process.join()
+            del self.frames
+            self.memory.close()
+            self.memory.unlink()
+        if self.error is not None:
+            raise RuntimeError('frame recorder failed: %s' % self.error)
+        return self.written
+
+
+class FrameRecording():
+    """A recording on disk; frame(i) is a (height, width, 4) BGRA memory map."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != RECORDING_FORMAT:
+            raise ValueError('%s is not a %s recording' % (path, RECORDING_FORMAT))
+        self.width = self.meta['width']
+        self.height = self.meta['height']
+        self.index = np.fromfile(os.path.join(path, 'index.bin'), dtype=INDEX_DTYPE)
+        self.chunks = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _chunk(self, chunk):
+        frames = self.chunks.get(chunk)
+        if frames is None:
+            frames = np.memmap(chunk_path(self.path, chunk), dtype=np.uint8, mode='r')
+            frames = frames.reshape(-1, self.height, self.width, 4)
+            self.chunks[chunk] = frames
+        return frames
+
+    def frame(self, i):
+        record = self.index[i]
+        return self._chunk(int(record['chunk']))[int(record['position'])]
+
+
+def export_png(recording, output):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from camera_frames import SurfaceFramePath
+    os.makedirs(output, exist_ok=True)
+    frame_path = SurfaceFramePath(buffers=1)
+    for i in range(len(recording)):
+        surface, _ = frame_path.surface(recording.frame(i), recording.width, recording.height)
+        pygame.image.save(surface, os.path.join(output, '%08d.png' % recording.index[i]['frame']))
+
+
+def export_mp4(recording, output, fps=None):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError('cannot find ffmpeg, make sure ffmpeg is installed and on the PATH')
+    command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'bgra',
+               '-s', '%dx%d' % (recording.width, recording.height), '-r', str(fps or recording.meta['fps']),
+               '-i', '-', '-pix_fmt', 'yuv420p', output]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        for i in range(len(recording)):
+            process.stdin.write(recording.frame(i).tobytes())
+    finally:
+        process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError('ffmpeg exited with %d' % process.returncode)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = argparser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help='export a recording to PNG files or an MP4')
+    export.add_argument('recording', help='recording directory')
+    export.add_argument('--png', metavar='DIR', help='write one PNG per frame to DIR')
+    export.add_argument('--mp4', metavar='FILE', help='encode the frames to FILE with ffmpeg')
+    export.add_argument('--fps', type=float, help='MP4 frame rate (default: the recording\'s)')
+    args = argparser.parse_args()
+
+    if not args.png and not args.mp4:
+        argparser.error('nothing to export, give --png and/or --mp4')
+    recording = FrameRecording(args.recording)
+    if args.png:
+        export_png(recording, args.png)
+        print('exported %d frames to %s' % (len(recording), args.png))
+    if args.mp4:
+        export_mp4(recording, args.mp4, args.fps)
+        print('exported %d frames to %s' % (len(recording), args.mp4))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,21 @@
 
-import csv
 import glob
 import math
 import os
 import sys
 import time
-import pprint
+from drivetrain import DrivetrainTable, calculate_engine_power
+from lifecycle import ActorLifecycleManager
+from live_prediction import LiveFuelPredictor, WeatherState
 from models.fuel_consumption_predictor import FuelConsumptionPredictor
-from utils import calculate_engine_rpm, get_vehicle_inclination, calculate_fuel_consumption
+from profiling import NullProfiler, TickProfiler
+from run_control import RunLimits, RunProgress, load_checkpoint, save_checkpoint
+from sinks import TelemetrySink, open_sink
+from spawning import BulkSpawner
+from telemetry import TelemetryBuffer, TelemetryExtractor
+from tick_pipeline import TickPipeline
+from utils import calculate_engine_rpm_array, calculate_fuel_consumption_array
+from vehicle_state import VehicleStateRegistry
 
 try:
     sys.path.append(glob.glob('../carla/dist/carla-*%d.%d-%s.egg' % (
@@ -23,6 +31,7 @@ from carla import VehicleLightState as vls
 
 import argparse
 import logging
+import numpy as np
 from numpy import random
 
 def get_actor_blueprints(world, filter, generation):
@@ -54,7 +63,11 @@ class GenerateTraffic():
     def __init__(self, host='127.0.0.1', port=2000, number_of_vehicles=30, number_of_walkers=10,
                  safe=True, filterv='vehicle.audi.*', generationv='All', filterw='walker.pedestrian.*',
                  generationw='2', tm_port=8000, asynch=False, hybrid=False, seed=None, seedw=0,
-                 car_lights_on=False, hero=False, respawn=True, no_rendering=False):
+                 car_lights_on=False, hero=False, respawn=True, no_rendering=False,
+                 telemetry_path='vehicle_data.csv', telemetry_format=None, telemetry_writer=None,
+                 keep_telemetry=True, log_every=100, model_path=None, pipeline_depth=0, profile=None,
+                 run_limits=None, checkpoint_path=None, checkpoint_every=100, resume=False,
+                 prediction_cache=None, prediction_every=10, prediction_speed_delta=5.0, gas_type=1, ac=1):
         self.host = host
         self.port = port
         self.number_of_vehicles = number_of_vehicles
@@ -73,345 +86,366 @@ class GenerateTraffic():
         self.hero = hero
         self.respawn = respawn
         self.no_rendering = no_rendering
+        # telemetry output, the format defaults to the file extension (csv, ndjson, parquet)
+        self.telemetry_path = telemetry_path
+        self.telemetry_format = telemetry_format
+        # a writer object (write_batch/close, see sinks.py) used instead of telemetry_path
+        self.telemetry_writer = telemetry_writer
+        self.keep_telemetry = keep_telemetry
+        # progress is logged every `log_every` ticks, 0 disables it
+        self.log_every = log_every
+        # fuel model checkpoint, None for the predictor's default
+        self.model_path = model_path
+        # optional models.prediction_cache.PredictionCache in front of the fuel model
+        self.prediction_cache = prediction_cache
+        # fuel predictions follow each vehicle's speed, odometer and the weather; a
+        # vehicle is re-predicted every `prediction_every` ticks, or sooner when its
+        # speed changed by `prediction_speed_delta` km/h. Fuel type and AC are not
+        # simulated, they are the same for the whole fleet
+        self.prediction_every = prediction_every
+        self.prediction_speed_delta = prediction_speed_delta
+        self.gas_type = gas_type
+        self.ac = ac
+        # frames processed on a worker thread while the next ones are ticked, 0 is serial
+        self.pipeline_depth = pipeline_depth
+        # TickPipeline of the last run, holds the processing and saved time
+        self.tick_pipeline = None
+        # opt-in per-phase timings: True to collect them, or a path to also dump a
+        # Chrome trace (*.json) or speedscope profile (*.speedscope.json) at shutdown
+        self.profile = profile
+        self.profiler = NullProfiler()
+        # when the run stops, 10000 ticks unless told otherwise (see RunLimits)
+        self.run_limits = run_limits if run_limits is not None else RunLimits(ticks=10000)
+        # progress and vehicle state are saved every `checkpoint_every` ticks and at
+        # the end of the run; with resume=True a run continues from the checkpoint
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.resume = resume
+        # RunProgress of the last run
+        self.progress = None
+        # RpcCounter of the last run, see TelemetryExtractor
+        self.rpc_counter = None
         
     def start_traffic(self):
         logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
 
         vehicles_list = []
         walkers_list = []
-        all_id = []
+        telemetry = None
         client = carla.Client(self.host, self.port)
         client.set_timeout(10.0)
         synchronous_master = True
         random.seed(self.seed if self.seed is not None else int(time.time()))
+        self.profiler = TickProfiler() if self.profile else NullProfiler()
+
+        # everything spawned is registered here and destroyed, with the settings restored, on exit
+        with ActorLifecycleManager(client) as lifecycle:
+            try:
+                world = lifecycle.world
+
+                traffic_manager = client.get_trafficmanager(self.tm_port)
+                traffic_manager.set_global_distance_to_leading_vehicle(2.5)
+                if self.respawn:
+                    traffic_manager.set_respawn_dormant_vehicles(True)
+                if self.hybrid:
+                    traffic_manager.set_hybrid_physics_mode(True)
+                    traffic_manager.set_hybrid_physics_radius(70.0)
+                if self.seed is not None:
+                    traffic_manager.set_random_device_seed(self.seed)
 
-        try:
-            world = client.get_world()
-
-            traffic_manager = client.get_trafficmanager(self.tm_port)
-            traffic_manager.set_global_distance_to_leading_vehicle(2.5)
-            if self.respawn:
-                traffic_manager.set_respawn_dormant_vehicles(True)
-            if self.hybrid:
-                traffic_manager.set_hybrid_physics_mode(True)
-                traffic_manager.set_hybrid_physics_radius(70.0)
-            if self.seed is not None:
-                traffic_manager.set_random_device_seed(self.seed)
-
-            settings = world.get_settings()
-
-            if not self.asynch:
-                traffic_manager.set_synchronous_mode(True)
-                if not settings.synchronous_mode:
-                    synchronous_master = True
-                    settings.synchronous_mode = True
-                    settings.fixed_delta_seconds = 1
-                else:
-                    synchronous_master = False
-            else:
-                print("You are currently in asynchronous mode. If this is a traffic simulation, \
-                you could experience some issues. If it's not working correctly, switch to synchronous \
-                mode by using traffic_manager.set_synchronous_mode(True)")
-
-            if self.no_rendering:
-                settings.no_rendering_mode = True
-            world.apply_settings(settings)
-            blueprints = get_actor_blueprints(world, self.filterv, self.generationv)
-            blueprintsWalkers = get_actor_blueprints(world, self.filterw, self.generationw)
-
-            if self.safe:
-                blueprints = [x for x in blueprints if x.get_attribute('base_type') == 'car']
-
-            blueprints = sorted(blueprints, key=lambda bp: bp.id)
-
-            spawn_points = world.get_map().get_spawn_points()
-            number_of_spawn_points = len(spawn_points)
-
-            if self.number_of_vehicles < number_of_spawn_points:
-                random.shuffle(spawn_points)
-            elif self.number_of_vehicles > number_of_spawn_points:
-                msg = 'requested %d vehicles, but could only find %d spawn points'
-                logging.warning(msg, self.number_of_vehicles, number_of_spawn_points)
-                self.number_of_vehicles = number_of_spawn_points
-
-            # @todo cannot import these directly.
-            SpawnActor = carla.command.SpawnActor
-            SetAutopilot = carla.command.SetAutopilot
-            FutureActor = carla.command.FutureActor
-
-            # --------------
-            # Spawn vehicles
-            # --------------
-            batch = []
-            hero = self.hero
-            for n, transform in enumerate(spawn_points):
-                if n >= self.number_of_vehicles:
-                    break
-                blueprint = random.choice(blueprints)
-                if blueprint.has_attribute('color'):
-                    color = random.choice(blueprint.get_attribute('color').recommended_values)
-                    blueprint.set_attribute('color', color)
-                if blueprint.has_attribute('driver_id'):
-                    driver_id = random.choice(blueprint.get_attribute('driver_id').recommended_values)
-                    blueprint.set_attribute('driver_id', driver_id)
-                if hero:
-                    blueprint.set_attribute('role_name', 'hero')
-                    hero = False
-                else:
-                    blueprint.set_attribute('role_name', 'autopilot')
-
-                # spawn the cars and set their autopilot and light state all together
-                batch.append(SpawnActor(blueprint, transform)
-                    .then(SetAutopilot(FutureActor, True, traffic_manager.get_port())))
+                settings = world.get_settings()
 
-            for response in client.apply_batch_sync(batch, synchronous_master):
-                if response.error:
-                    logging.error(response.error)
-                else:
-                    vehicles_list.append(response.actor_id)
-
-            # Set automatic vehicle lights update if specified
-            if self.car_lights_on:
-                all_vehicle_actors = world.get_actors(vehicles_list)
-                for actor in all_vehicle_actors:
-                    traffic_manager.update_vehicle_lights(actor, True)
-
-            # -------------
-            # Spawn Walkers
-            # -------------
-            # some settings
-            percentagePedestriansRunning = 0.0      # how many pedestrians will run
-            percentagePedestriansCrossing = 0.0     # how many pedestrians will walk through the road
-            if self.seedw:
-                world.set_pedestrians_seed(self.seedw)
-                random.seed(self.seedw)
-            # 1. take all the random locations to spawn
-            spawn_points = []
-            for i in range(self.number_of_walkers):
-                spawn_point = carla.Transform()
-                loc = world.get_random_location_from_navigation()
-                if (loc != None):
-                    spawn_point.location = loc
-                    spawn_points.append(spawn_point)
-            # 2. we spawn the walker object
-            batch = []
-            walker_speed = []
-            for spawn_point in spawn_points:
-                walker_bp = random.choice(blueprintsWalkers)
-                # set as not invincible
-                if walker_bp.has_attribute('is_invincible'):
-                    walker_bp.set_attribute('is_invincible', 'false')
-                # set the max speed
-                if walker_bp.has_attribute('speed'):
-                    if (random.random() > percentagePedestriansRunning):
-                        # walking
-                        walker_speed.append(walker_bp.get_attribute('speed').recommended_values[1])
+                if not self.asynch:
+                    traffic_manager.set_synchronous_mode(True)
+                    if not settings.synchronous_mode:
+                        synchronous_master = True
+                        lifecycle.track_traffic_manager(traffic_manager)
+                        settings.synchronous_mode = True
+                        settings.fixed_delta_seconds = 1
                     else:
-                        # running
-                        walker_speed.append(walker_bp.get_attribute('speed').recommended_values[2])
+                        synchronous_master = False
                 else:
-                    print("Walker has no speed")
-                    walker_speed.append(0.0)
-                batch.append(SpawnActor(walker_bp, spawn_point))
-            results = client.apply_batch_sync(batch, True)
-            walker_speed2 = []
-            for i in range(len(results)):
-                if results[i].error:
-                    logging.error(results[i].error)
+                    print("You are currently in asynchronous mode. If this is a traffic simulation, \
+                    you could experience some issues. If it's not working correctly, switch to synchronous \
+                    mode by using traffic_manager.set_synchronous_mode(True)")
+
+                if self.no_rendering:
+                    settings.no_rendering_mode = True
+                world.apply_settings(settings)
+                blueprints = get_actor_blueprints(world, self.filterv, self.generationv)
+                blueprintsWalkers = get_actor_blueprints(world, self.filterw, self.generationw)
+
+                if self.safe:
+                    blueprints = [x for x in blueprints if x.get_attribute('base_type') == 'car']
+
+                blueprints = sorted(blueprints, key=lambda bp: bp.id)
+
+                spawn_points = world.get_map().get_spawn_points()
+                number_of_spawn_points = len(spawn_points)
+
+                if self.number_of_vehicles < number_of_spawn_points:
+                    random.shuffle(spawn_points)
+                elif self.number_of_vehicles > number_of_spawn_points:
+                    msg = 'requested %d vehicles, but could only find %d spawn points'
+                    logging.warning(msg, self.number_of_vehicles, number_of_spawn_points)
+                    self.number_of_vehicles = number_of_spawn_points
+
+                spawner = BulkSpawner(client, world, lifecycle=lifecycle)
+
+                # --------------
+                # Spawn vehicles
+                # --------------
+                requests = []
+                hero = self.hero
+                for n in range(self.number_of_vehicles):
+                    blueprint = random.choice(blueprints)
+                    attributes = {}
+                    if blueprint.has_attribute('color'):
+                        attributes['color'] = random.choice(blueprint.get_attribute('color').recommended_values)
+                    if blueprint.has_attribute('driver_id'):
+                        attributes['driver_id'] = random.choice(blueprint.get_attribute('driver_id').recommended_values)
+                    if hero:
+                        attributes['role_name'] = 'hero'
+                        hero = False
+                    else:
+                        attributes['role_name'] = 'autopilot'
+                    requests.append((blueprint, attributes))
+
+                # spawn the cars and set their autopilot all together, failed spawns
+                # are retried on the spawn points left over
+                vehicles_list.extend(spawner.spawn_vehicles(
+                    requests, spawn_points, traffic_manager.get_port(), synchronous_master))
+
+                # Set automatic vehicle lights update if specified
+                if self.car_lights_on:
+                    all_vehicle_actors = world.get_actors(vehicles_list)
+                    for actor in all_vehicle_actors:
+                        traffic_manager.update_vehicle_lights(actor, True)
+
+                # -------------
+                # Spawn Walkers
+                # -------------
+                # some settings
+                percentagePedestriansRunning = 0.0      # how many pedestrians will run
+                percentagePedestriansCrossing = 0.0     # how many pedestrians will walk through the road
+                if self.seedw:
+                    world.set_pedestrians_seed(self.seedw)
+                    random.seed(self.seedw)
+                # 1. navigation locations for spawning and for the walk targets, fetched up front
+                spawner.prefetch_locations(2 * self.number_of_walkers)
+                # 2. we spawn the walker objects and their controllers
+                requests = []
+                for n in range(self.number_of_walkers):
+                    walker_bp = random.choice(blueprintsWalkers)
+                    attributes = {}
+                    # set as not invincible
+                    if walker_bp.has_attribute('is_invincible'):
+                        attributes['is_invincible'] = 'false'
+                    # set the max speed
+                    if walker_bp.has_attribute('speed'):
+                        if (random.random() > percentagePedestriansRunning):
+                            # walking
+                            speed = walker_bp.get_attribute('speed').recommended_values[1]
+                        else:
+                            # running
+                            speed = walker_bp.get_attribute('speed').recommended_values[2]
+                    else:
+                        print("Walker has no speed")
+                        speed = 0.0
+                    requests.append((walker_bp, attributes, speed))
+                walkers_list = spawner.spawn_walkers(requests)
+
+                # wait for a tick to ensure client receives the last transform of the walkers we have just created
+                if self.asynch or not synchronous_master:
+                    world.wait_for_tick()
                 else:
-                    walkers_list.append({"id": results[i].actor_id})
-                    walker_speed2.append(walker_speed[i])
-            walker_speed = walker_speed2
-            # 3. we spawn the walker controller
-            batch = []
-            walker_controller_bp = world.get_blueprint_library().find('controller.ai.walker')
-            for i in range(len(walkers_list)):
-                batch.append(SpawnActor(walker_controller_bp, carla.Transform(), walkers_list[i]["id"]))
-            results = client.apply_batch_sync(batch, True)
-            for i in range(len(results)):
-                if results[i].error:
-                    logging.error(results[i].error)
+                    world.tick()
+
+                # 3. initialize each controller and set target to walk to
+                # set how many pedestrians can cross the road
+                world.set_pedestrians_cross_factor(percentagePedestriansCrossing)
+                spawner.start_walkers(walkers_list)
+                logging.info('spawning took %d simulator calls in %d sequential round-trips',
+                             spawner.rpc_calls, spawner.waves)
+
+                print('spawned %d vehicles and %d walkers, press Ctrl+C to exit.' % (len(vehicles_list), len(walkers_list)))
+
+                # Example of how to use Traffic Manager parameters
+                traffic_manager.global_percentage_speed_difference(10.0)
+                # a resumed run continues the counters, odometers and telemetry file of its checkpoint
+                resumed = bool(self.resume and self.checkpoint_path and os.path.exists(self.checkpoint_path))
+                # telemetry is streamed to disk by a background writer as it is produced
+                if self.telemetry_writer is not None:
+                    sink = TelemetrySink(self.telemetry_writer)
                 else:
-                    walkers_list[i]["con"] = results[i].actor_id
-            # 4. we put together the walkers and controllers id to get the objects from their id
-            for i in range(len(walkers_list)):
-                all_id.append(walkers_list[i]["con"])
-                all_id.append(walkers_list[i]["id"])
-            all_actors = world.get_actors(all_id)
-
-            # wait for a tick to ensure client receives the last transform of the walkers we have just created
-            if self.asynch or not synchronous_master:
-                world.wait_for_tick()
-            else:
-                world.tick()
-
-            # 5. initialize each controller and set target to walk to (list is [controler, actor, controller, actor ...])
-            # set how many pedestrians can cross the road
-            world.set_pedestrians_cross_factor(percentagePedestriansCrossing)
-            for i in range(0, len(all_id), 2):
-                # start walker
-                all_actors[i].start()
-                # set walk to random point
-                all_actors[i].go_to_location(world.get_random_location_from_navigation())
-                # max speed
-                all_actors[i].set_max_speed(float(walker_speed[int(i/2)]))
-
-            print('spawned %d vehicles and %d walkers, press Ctrl+C to exit.' % (len(vehicles_list), len(walkers_list)))
-
-            # Example of how to use Traffic Manager parameters
-            traffic_manager.global_percentage_speed_difference(10.0)
-            with open('vehicle_data.csv', 'w', newline='') as csvfile:
-                fieldnames = [
-                    "Vehicle Speed",
-                    "Vehicle Acceleration",
-                    "Vehicle Throttle",
-                    "Vehicle Brake",
-                    "Vehicle Steer",
-                    "Vehicle Gear",
-                    "Vehicle Manual Gear Shift",
-                    "Vehicle Hand Brake"
-                ]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-                # Write header row to CSV file
-                writer.writeheader()
-
-                # distance travelled array
-                vehicles_distance_travelled = []
-                all_vehicle_actors = world.get_actors(vehicles_list)
-                for vehicle in all_vehicle_actors:
-                    vehicle_id = vehicle.id
-                    vehicle_distance_travelled = vehicle.get_location()
-                    vehicle_info = {
-                        "id": vehicle_id,
-                        "vehicle_object": vehicle,
-                        "previous_location": vehicle.get_location(),
-                        "distance_travelled": 0,
-                        "fuel_consumption": 0,
-                    }
-                    vehicles_distance_travelled.append(vehicle_info)
- 
-                def get_previous_location(vehicle_id):
-                    for vehicle_info in vehicles_distance_travelled:
-                        if vehicle_info["id"] == vehicle_id:
-                            return vehicle_info["previous_location"]
-                def get_odometer_value(vehicle_id):
-                    for vehicle_info in vehicles_distance_travelled:
-                        if vehicle_info["id"] == vehicle_id:
-                            return vehicle_info["distance_travelled"]
-                def update_odometer(vehicle_id, distance):
-                    for vehicle_info in vehicles_distance_travelled:
-                        if vehicle_info["id"] == vehicle_id:
-                            vehicle_info["distance_travelled"] += distance
-                def update_fuel_consumption(vehicle_id, fuel_consumption):
-                    for vehicle_info in vehicles_distance_travelled:
-                        if vehicle_info["id"] == vehicle_id:
-                            vehicle_info["fuel_consumption"] += fuel_consumption
-                        
-                # Main loop
-                count = 0
-                customspeed = 0
-                arr = []
-                while count < 10000:
-                    if not self.asynch and synchronous_master:
-                        world.tick()
-                        all_vehicle_actors = world.get_actors(vehicles_list)
-                        for i in all_vehicle_actors:
-
-                            # Basic Stuff
-                            control = i.get_control()
-                            gear = control.gear
-                            physics = i.get_physics_control()
-                            throttle = control.throttle
-                            mass = physics.mass
-                            drag_coefficient = physics.drag_coefficient
-                            moi = physics.moi
-                            max_rpm = physics.max_rpm
-                            speed = i.get_velocity().length()
-                            final_drive_ratio = physics.final_ratio
-                            try:
-                                gear_ratio = physics.forward_gears[gear].ratio
-                            except IndexError:
-                                gear_ratio = physics.forward_gears[0].ratio
-                            wheel_radius = physics.wheels[0].radius / 100
-                            engine_rpm = calculate_engine_rpm(gear, gear_ratio, final_drive_ratio, speed, wheel_radius)
-                            rotation = i.get_transform().rotation
-                            inclination = get_vehicle_inclination(rotation)
-                            customspeed += speed
-                            # Torque Curve Data 
-                            torque_curve_data = []
-                            for vector in i.get_physics_control().torque_curve:
-                                x_value = vector.x
-                                y_value = vector.y
-                                torque_curve_data.append((x_value, y_value))
-                            this_world = i.get_world()
-
-                            # Fuel level prediction
-                            predictor = FuelConsumptionPredictor()
-                            prediction = predictor.predict(50.0, 60.0, 1, 1, 0, 1) #(distance, speed, gas_type, AC, rain, sun):
-                            print("Predicted fuel consumption:", prediction)
-                           
-                            # Updating Odometer
-                            distance = i.get_location().distance(get_previous_location(i.id))
-                            update_odometer(i.id, distance)
-                            odometer = get_odometer_value(i.id)
-                            # Calculating Fuel Consumption
-                            fuel_consumption = calculate_fuel_consumption(mass, i.get_acceleration().length(), speed, engine_rpm, distance, drag_coefficient, moi) # def calculate_fuel_consumption(mass_vehicle, acceleration, speed, rpm, distance, drag_coefficient, moment_of_inertia):
-                            update_fuel_consumption(i.id, fuel_consumption)
-                            vehicle_info = {
-                                "Time Step": count,
-                                "Vehicle Speed": i.get_velocity().length(),
-                                "Vehicle Acceleration": i.get_acceleration().length(),
-                                "Vehicle Throttle": i.get_control().throttle,
-                                "Vehicle Brake": i.get_control().brake,
-                                "Vehicle Steer": i.get_control().steer,
-                                "Vehicle Gear": i.get_control().gear,
-                                "Vehicle Manual Gear Shift": i.get_control().manual_gear_shift,
-                                "Vehicle Hand Brake": i.get_control().hand_brake,
-                                "tire friction of tire 1": i.get_physics_control().wheels[0].tire_friction,
-                                "max_rpm": i.get_physics_control().max_rpm,
-                                "torque_curve": torque_curve_data,
-                                "accelerometer": i.get_acceleration().length(), 
-                                "odometer": odometer,
-                                "fuel_consumption_per_100km": prediction,
-                                "engine_rpm": engine_rpm,
-                                "inclination": inclination,
-                                "max_rpm": max_rpm,
-                                "throttle": throttle,
-                                "fuel_consumption": fuel_consumption,
-                                "moi": moi,
-                                "drag_coefficient": drag_coefficient,
-                                "mass": mass,
-                            }
-                            # Write vehicle_info to CSV file
-                            pprint.pprint(vehicle_info)
-                            arr.append(vehicle_info)
-                            count += 1
-                            print(customspeed/count)
-
+                    sink = open_sink(self.telemetry_path, self.telemetry_format, append=resumed)
+                with sink:
+
+                    # dynamic state is read from the tick snapshot, physics control is
+                    # fetched once per vehicle here and reused for the whole run
+                    extractor = TelemetryExtractor(world)
+                    self.rpc_counter = extractor.rpc
+                    extractor.register_all(vehicles_list)
+                    snapshot = world.get_snapshot()
+
+                    # in-memory copy of the run, skipped for long runs to keep memory flat
+                    telemetry = TelemetryBuffer() if self.keep_telemetry else None
+                    # odometer, fuel and previous location of every vehicle, keyed by actor id
+                    vehicle_state = VehicleStateRegistry()
+                    # the fleet is respawned on resume, the n-th vehicle continues the
+                    # odometer and fuel of the checkpoint's n-th vehicle
+                    fleet = [x for x in vehicles_list if x in extractor.physics]
+                    if resumed:
+                        progress = load_checkpoint(self.checkpoint_path, vehicle_state, fleet)
+                        logging.info('resuming from %s after %d ticks', self.checkpoint_path, progress.ticks)
                     else:
-                        world.wait_for_tick()
-        
-
-        finally:
-            if not self.asynch and synchronous_master:
-                settings = world.get_settings()
-                settings.synchronous_mode = False
-                settings.no_rendering_mode = False
-                settings.fixed_delta_seconds = None
-                world.apply_settings(settings)
-
-            print('\ndestroying %d vehicles' % len(vehicles_list))
-            client.apply_batch([carla.command.DestroyActor(x) for x in vehicles_list])
-
-            # stop walker controllers (list is [controller, actor, controller, actor ...])
-            for i in range(0, len(all_id), 2):
-                all_actors[i].stop()
-
-            print('\ndestroying %d walkers' % len(walkers_list))
-            client.apply_batch([carla.command.DestroyActor(x) for x in all_id])
-            return arr    
-            time.sleep(0.5)
+                        progress = RunProgress()
+                    self.progress = progress
+                    # gear ratios, wheel radius, torque curve... per blueprint
+                    drivetrain = DrivetrainTable()
+                    for actor_id, physics in extractor.physics.items():
+                        drivetrain.register(actor_id, extractor.actors[actor_id].type_id, physics)
+                        vehicle_state.register(actor_id, snapshot.find(actor_id).get_transform().location)
+                        # Static data is recorded once per actor, not per sample; the
+                        # torque curve lives in the drivetrain table
+                        if telemetry is not None:
+                            telemetry.set_static(
+                                actor_id,
+                                **{"tire friction of tire 1": physics.wheels[0].tire_friction,
+                                   "max_rpm": physics.max_rpm,
+                                   "moi": physics.moi,
+                                   "drag_coefficient": physics.drag_coefficient,
+                                   "mass": physics.mass})
+
+                    # the model is loaded once and queried once per tick for the vehicles due a refresh
+                    predictor = FuelConsumptionPredictor(self.model_path, cache=self.prediction_cache)
+                    live_predictor = LiveFuelPredictor(predictor, refresh_every=self.prediction_every,
+                                                       speed_delta=self.prediction_speed_delta,
+                                                       gas_type=self.gas_type, AC=self.ac)
+                    # polled on the main thread with the snapshot, the flags travel with the tick
+                    weather = WeatherState(world, poll_every=self.prediction_every, rpc=extractor.rpc)
+
+                    customspeed = 0
+                    processed_ticks = 0
+                    processed_samples = 0
+                    profiler = self.profiler
+
+                    def process_tick(frame, state, tick, rain, sun, weather_changed):
+                        nonlocal customspeed, processed_ticks, processed_samples
+                        tick_ids = state["actor_id"].tolist()
+                        speeds = state["speed"]
+                        accelerations = state["acceleration"]
+                        customspeed += speeds.sum()
+
+                        # Updating Odometer, one distance computation for the whole fleet
+                        with profiler.phase("odometer update"):
+                            distances = vehicle_state.update_locations(tick_ids, state["location"])
+                            odometers = vehicle_state.get_odometer(tick_ids)
+
+                        with profiler.phase("physics read"):
+                            # drivetrain constants for the whole fleet in one lookup
+                            gears = state["gear"]
+                            rows = drivetrain.rows(tick_ids)
+                            gear_ratios = drivetrain.gear_ratio(rows, gears)
+                            final_drive_ratios = drivetrain.final_ratio[rows]
+                            wheel_radii = drivetrain.rolling_radius[rows]
+                            masses = drivetrain.mass[rows]
+                            drag_coefficients = drivetrain.drag_coefficient[rows]
+                            mois = drivetrain.moi[rows]
+                            engine_rpms = calculate_engine_rpm_array(gears, gear_ratios, final_drive_ratios, speeds, wheel_radii)
+                            engine_torques = drivetrain.engine_torque(rows, engine_rpms, state["throttle"])
+                            engine_powers = calculate_engine_power(engine_torques, engine_rpms)
+                            # Calculating Fuel Consumption
+                            fuel_consumptions = calculate_fuel_consumption_array(masses, accelerations, speeds, engine_rpms, distances, drag_coefficients, mois)
+                            vehicle_state.add_fuel_consumption(tick_ids, fuel_consumptions)
+                            progress.distance += distances.sum()
+                            progress.fuel_consumption += fuel_consumptions.sum()
+
+                        # Fuel level prediction from speed (km/h), odometer (km) and the weather,
+                        # one batched model call per tick for the vehicles due a refresh
+                        with profiler.phase("model inference"):
+                            predictions = live_predictor.predict(
+                                vehicle_state.rows(tick_ids), processed_ticks, 3.6 * speeds, odometers / 1000.0,
+                                rain, sun, force=weather_changed)
+
+                        columns = {
+                            # the run's tick, it continues across resumed chunks
+                            "Time Step": np.full(len(tick_ids), tick, dtype=np.int64),
+                            "actor_id": state["actor_id"],
+                            "Vehicle Speed": speeds,
+                            "Vehicle Acceleration": accelerations,
+                            "Vehicle Throttle": state["throttle"],
+                            "Vehicle Brake": state["brake"],
+                            "Vehicle Steer": state["steer"],
+                            "Vehicle Gear": state["gear"],
+                            "Vehicle Manual Gear Shift": state["manual_gear_shift"],
+                            "Vehicle Hand Brake": state["hand_brake"],
+                            "accelerometer": accelerations,
+                            "odometer": odometers,
+                            "fuel_consumption_per_100km": predictions,
+                            "engine_rpm": engine_rpms,
+                            "engine_torque": engine_torques,
+                            "engine_power": engine_powers,
+                            # the pitch component of the rotation is the inclination
+                            "inclination": state["pitch"],
+                            "fuel_consumption": fuel_consumptions,
+                        }
+                        with profiler.phase("sink write"):
+                            sink.write(columns)
+                            if telemetry is not None:
+                                telemetry.append_batch(columns)
+                        processed_ticks += 1
+                        processed_samples += len(tick_ids)
+                        if self.log_every and processed_ticks % self.log_every == 0 and processed_samples:
+                            logging.info('frame %d, tick %d, mean speed %.2f m/s',
+                                         frame, tick, customspeed / processed_samples)
+
+                    # Main loop, tick N+1 is requested while tick N is processed when pipelined.
+                    # Limits on distance or a predicate are checked against processed ticks,
+                    # so a pipelined run may overshoot them by up to pipeline_depth ticks.
+                    limits = self.run_limits
+                    chunk_start = progress.ticks
+                    pipeline = TickPipeline(process_tick, depth=self.pipeline_depth)
+                    self.tick_pipeline = pipeline
+                    with pipeline:
+                        while not limits.should_stop(progress, chunk_start):
+                            if not self.asynch and synchronous_master:
+                                with profiler.phase("tick wait"):
+                                    snapshot = extractor.tick()
+                                with profiler.phase("actor fetch"):
+                                    state = extractor.extract(snapshot)
+                                    rain, sun = weather.update(progress.ticks - chunk_start)
+                                pipeline.submit(snapshot.frame, state, progress.ticks, rain, sun, weather.changed)
+                                progress.samples += len(state["actor_id"])
+                                extractor.rpc.end_tick()
+
+                            else:
+                                snapshot = world.wait_for_tick()
+                            progress.ticks += 1
+                            progress.sim_seconds += snapshot.timestamp.delta_seconds
+                            progress.frame = snapshot.frame
+                            if self.checkpoint_path and progress.ticks % self.checkpoint_every == 0:
+                                pipeline.drain()
+                                save_checkpoint(self.checkpoint_path, progress, vehicle_state, fleet)
+                    if self.checkpoint_path:
+                        save_checkpoint(self.checkpoint_path, progress, vehicle_state, fleet)
+                    logging.info('%.1f simulator round-trips per tick', extractor.rpc.mean)
+                    if pipeline.calibrated:
+                        logging.info('pipelining saved %.2f ms per tick (%.2f ms serial, %.2f ms pipelined)',
+                                     1000 * pipeline.saved_seconds_per_tick, 1000 * pipeline.mean_tick_seconds(True),
+                                     1000 * pipeline.mean_tick_seconds(False))
+                    logging.info('%.1f%% of fuel predictions refreshed', 100 * live_predictor.refresh_rate)
+                    if self.prediction_cache is not None:
+                        logging.info('prediction cache: %(hit_rate).1f%% hits, %(size)d entries, %(evictions)d evictions',
+                                     dict(self.prediction_cache.stats(), hit_rate=100 * self.prediction_cache.hit_rate))
+
+            finally:
+                if self.profiler.enabled:
+                    self.profiler.report()
+                    if isinstance(self.profile, str):
+                        self.profiler.dump(self.profile)
+
+        return telemetry
 
 
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+import numpy as np
+import pygame
+
+from camera_frames import BGRX_MASKS, BGRX_NATIVE
+
+COLOR_MODES = ('white', 'intensity', 'height')
+
+# colormap anchors for intensity / height, low to high
+COLORMAP = np.array([
+    (48, 18, 59), (40, 120, 240), (30, 210, 200), (120, 250, 80), (240, 200, 40), (220, 60, 20)], dtype=np.float64)
+
+
+def packed_lut(anchors, size=256):
+    # `size` colors interpolated along `anchors`, packed as 0xRRGGBB
+    x = np.linspace(0.0, len(anchors) - 1, size)
+    rgb = [np.interp(x, np.arange(len(anchors)), anchors[:, c]).astype(np.uint32) for c in range(3)]
+    return (rgb[0] << 16) | (rgb[1] << 8) | rgb[2]
+
+
+class LidarRasterizer():
+    """
+    Bird's-eye view of lidar sweeps, drawn into buffers that are reused.
+
+    Points are (x, y, z, intensity) in the sensor's frame; `lidar_range`
+    meters map to half the shorter side of the image. Points are clipped to
+    the image instead of folded into it, and colored white or along a
+    colormap by intensity (0..1) or by height within `height_range`.
+
+    With `decay` > 0 earlier sweeps fade out instead of being cleared, each
+    sweep multiplying the image by `decay`; with 0 only the last sweep shows.
+    The image is kept as packed 0xRRGGBB pixels in row order, the layout of
+    the staging Surfaces, so handing it to pygame is a plain copy.
+    """
+
+    def __init__(self, width, height, lidar_range, color='white', decay=0.0, height_range=(-3.0, 1.0),
+                 buffers=3):
+        if color not in COLOR_MODES:
+            raise ValueError('unknown lidar color %r, expected one of %s' % (color, ', '.join(COLOR_MODES)))
+        if not 0.0 <= decay < 1.0:
+            raise ValueError('lidar decay must be in [0, 1), got %r' % decay)
+        self.width = width
+        self.height = height
+        self.color = color
+        self.decay = decay
+        self.scale = min(width, height) / (2.0 * lidar_range)
+        self.height_range = height_range
+        self.image = np.zeros((height, width), dtype=np.uint32)
+        # decay as a fixed point factor of 1/256, with scratch for _fade
+        self.fade = np.uint32(int(decay * 256))
+        self.scratch = (np.empty_like(self.image), np.empty_like(self.image)) if decay > 0.0 else None
+        self.lut = packed_lut(COLORMAP)
+        self.surfaces = [pygame.Surface((width, height), 0, 32, BGRX_MASKS) for _ in range(buffers)]
+        self.next = 0
+        self.sweeps = 0
+        self.points = 0
+
+    def clear(self):
+        self.image.fill(0)
+
+    def _fade(self):
+        # scales all three channels of the packed pixels at once: red and blue
+        # are 16 bits apart, so they are multiplied together without overlap
+        red_blue, green = self.scratch
+        np.bitwise_and(self.image, 0xFF00FF, out=red_blue)
+        red_blue *= self.fade
+        red_blue >>= 8
+        red_blue &= 0xFF00FF
+        np.bitwise_and(self.image, 0x00FF00, out=green)
+        green *= self.fade
+        green >>= 8
+        green &= 0x00FF00
+        np.bitwise_or(red_blue, green, out=self.image)
+
+    def _colors(self, points):
+        if self.color == 'intensity':
+            value = points[:, 3]
+        elif self.color == 'height':
+            low, high = self.height_range
+            value = (points[:, 2] - low) * (1.0 / (high - low))
+        else:
+            return np.uint32(0xFFFFFF)
+        index = np.clip(value * 255.0, 0.0, 255.0).astype(np.intp)
+        return self.lut[index]
+
+    def draw(self, points):
+        """Draws a sweep of (N, 4) float32 points into the image."""
+        if self.decay > 0.0:
+            self._fade()
+        else:
+            self.image.fill(0)
+        x = points[:, 0] * self.scale
+        x += 0.5 * self.width
+        y = points[:, 1] * self.scale
+        y += 0.5 * self.height
+        inside = (x >= 0.0) & (x < self.width) & (y >= 0.0) & (y < self.height)
+        colors = self._colors(points)
+        if colors.ndim:
+            colors = colors[inside]
+        pixel = y[inside].astype(np.intp)
+        pixel *= self.width
+        pixel += x[inside].astype(np.intp)
+        self.image.reshape(-1)[pixel] = colors
+        self.sweeps += 1
+        self.points += len(pixel)
+
+    def surface(self):
+        """The image as a Surface; the last `buffers` returned are not overwritten."""
+        surface = self.surfaces[self.next]
+        self.next = (self.next + 1) % len(self.surfaces)
+        if BGRX_NATIVE and surface.get_pitch() == 4 * self.width:
+            view = surface.get_view('2')
+            np.asarray(view).T[:] = self.image
+            del view
+        else:
+            pygame.surfarray.blit_array(surface, self.image.T)
+        return surface
+
+    def sweep_surface(self, raw_data):
+        # raw lidar measurement bytes -> Surface
+        points = np.frombuffer(raw_data, dtype=np.float32).reshape(-1, 4)
+        self.draw(points)
+        return self.surface()
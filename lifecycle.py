@@ -0,0 +1,127 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import carla
+
+
+class ActorLifecycleManager():
+    """
+    Tracks every actor spawned during a run and tears them all down on exit.
+
+    Used as a context manager around a run: on entry it fetches the world and
+    keeps a copy of its settings, on exit (also after an error or Ctrl+C) it
+    stops sensors and walker controllers, destroys every tracked actor with
+    a single batch of DestroyActor commands and re-applies the original
+    settings, so one long-lived process can run many times without leaking
+    actors or leaving the server in synchronous mode.
+
+        with ActorLifecycleManager(client) as lifecycle:
+            world = lifecycle.world
+            lifecycle.track_vehicles(vehicle_ids)
+            ...
+    """
+
+    def __init__(self, client, rpc_workers=16):
+        self.client = client
+        self.rpc_workers = rpc_workers
+        self.world = None
+        self.original_settings = None
+        self.traffic_managers = []
+        self.sensors = []
+        self.controllers = []
+        self.walkers = []
+        self.vehicles = []
+
+    def __enter__(self):
+        try:
+            self.open()
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.sensors) + len(self.controllers) + len(self.walkers) + len(self.vehicles)
+
+    def open(self):
+        # close() is safe to call even when this fails half-way
+        self.world = self.client.get_world()
+        self.original_settings = self.world.get_settings()
+        return self.world
+
+    def track_traffic_manager(self, traffic_manager):
+        # switched back to asynchronous mode on exit
+        self.traffic_managers.append(traffic_manager)
+
+    def track_vehicles(self, actor_ids):
+        self.vehicles.extend(actor_ids)
+
+    def track_walkers(self, walkers):
+        # walkers as returned by BulkSpawner.spawn_walkers ({"id", "con"} dicts)
+        for walker in walkers:
+            self.walkers.append(walker["id"])
+            if "con" in walker:
+                self.controllers.append(walker["con"])
+
+    def track_controllers(self, actor_ids):
+        self.controllers.extend(actor_ids)
+
+    def release(self, actor_ids):
+        # actors destroyed by their owner, they are no longer destroyed on exit
+        released = set(actor_ids)
+        self.controllers = [x for x in self.controllers if x not in released]
+        self.walkers = [x for x in self.walkers if x not in released]
+        self.vehicles = [x for x in self.vehicles if x not in released]
+
+    def track_sensor(self, sensor):
+        self.sensors.append(sensor)
+        return sensor
+
+    def _stop_controllers(self):
+        # there is no batch command to stop an AI controller, so the calls overlap
+        controllers = self.world.get_actors(self.controllers)
+
+        def stop(controller):
+            try:
+                controller.stop()
+            except RuntimeError as e:
+                logging.warning('could not stop walker controller %d: %s', controller.id, e)
+
+        with ThreadPoolExecutor(max(1, self.rpc_workers)) as executor:
+            list(executor.map(stop, controllers))
+
+    def restore_settings(self):
+        for traffic_manager in self.traffic_managers:
+            traffic_manager.set_synchronous_mode(False)
+        if self.world is not None and self.original_settings is not None:
+            self.world.apply_settings(self.original_settings)
+
+    def destroy_actors(self):
+        """Destroys every tracked actor in one batch, returns how many were destroyed."""
+        for sensor in self.sensors:
+            if sensor.is_listening:
+                sensor.stop()
+        if self.controllers:
+            self._stop_controllers()
+        # controllers before their walkers, sensors before what they are attached to
+        ids = [x.id for x in self.sensors] + self.controllers + self.walkers + self.vehicles
+        destroyed = 0
+        if ids:
+            for response in self.client.apply_batch_sync([carla.command.DestroyActor(x) for x in ids], False):
+                if response.error:
+                    logging.warning('could not destroy actor %d: %s', response.actor_id, response.error)
+                else:
+                    destroyed += 1
+        self.sensors, self.controllers, self.walkers, self.vehicles = [], [], [], []
+        return destroyed
+
+    def close(self):
+        # settings first, so nothing is left in synchronous mode even if a destroy fails
+        try:
+            self.restore_settings()
+        finally:
+            print('\ndestroying %d actors' % len(self))
+            self.destroy_actors()
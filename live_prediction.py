@@ -0,0 +1,119 @@
+import numpy as np
+
+# weather thresholds for the model's binary rain / sun inputs
+RAIN_PRECIPITATION = 10.0
+SUN_CLOUDINESS = 50.0
+
+# refresh tick of a vehicle that was never predicted
+NEVER = np.iinfo(np.int64).min // 2
+
+
+def weather_flags(weather):
+    # (rain, sun) of a carla.WeatherParameters as the fuel dataset records them
+    rain = int(weather.precipitation >= RAIN_PRECIPITATION)
+    sun = int(weather.sun_altitude_angle > 0.0 and weather.cloudiness < SUN_CLOUDINESS and not rain)
+    return rain, sun
+
+
+class WeatherState():
+    """
+    The world's rain / sun flags, polled every `poll_every` ticks.
+
+    The flags are only re-derived when the weather parameters differ from the
+    last poll; `changed` tells whether they did at the last update. Polling
+    is a simulator call, so update() belongs on the thread that ticks the
+    world; each poll is counted on `rpc` (a telemetry.RpcCounter) if given.
+    """
+
+    def __init__(self, world, poll_every=10, rpc=None):
+        self.world = world
+        self.poll_every = poll_every
+        self.rpc = rpc
+        self.weather = None
+        self.flags = (0, 0)
+        self.changed = False
+        self.last_poll = None
+
+    def update(self, tick):
+        self.changed = False
+        if self.last_poll is not None and tick - self.last_poll < self.poll_every:
+            return self.flags
+        self.last_poll = tick
+        weather = self.world.get_weather()
+        if self.rpc is not None:
+            self.rpc.add()
+        if self.weather is None or weather != self.weather:
+            self.weather = weather
+            flags = weather_flags(weather)
+            self.changed = flags != self.flags
+            self.flags = flags
+        return self.flags
+
+
+class LiveFuelPredictor():
+    """
+    Per-vehicle fuel predictions from the simulation state, refreshed lazily.
+
+    A vehicle's prediction is recomputed when it is `refresh_every` ticks old,
+    when its speed moved by `speed_delta` km/h or its trip distance by
+    `distance_delta` km since, or when the weather flags change; otherwise
+    the previous value is reused. All refreshes of a tick go to the model in
+    one predict_batch call. Vehicles are addressed by their row in a
+    VehicleStateRegistry.
+    """
+
+    def __init__(self, predictor, refresh_every=10, speed_delta=5.0, distance_delta=1.0, gas_type=1, AC=1,
+                 capacity=64):
+        self.predictor = predictor
+        self.refresh_every = refresh_every
+        self.speed_delta = speed_delta
+        self.distance_delta = distance_delta
+        self.gas_type = gas_type
+        self.AC = AC
+        self.prediction = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.distance = np.zeros(capacity, dtype=np.float64)
+        self.tick = np.full(capacity, NEVER, dtype=np.int64)
+        self.predicted = 0
+        self.requested = 0
+
+    @property
+    def refresh_rate(self):
+        # share of the requested predictions that went to the model
+        return self.predicted / self.requested if self.requested else 0.0
+
+    def _reserve(self, size):
+        capacity = len(self.prediction)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name, fill in (('prediction', 0.0), ('speed', 0.0), ('distance', 0.0), ('tick', NEVER)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def predict(self, rows, tick, speed, distance, rain, sun, force=False):
+        """
+        Fuel consumption (l/100km) of the vehicles in `rows` at `tick`, with
+        their speed in km/h and trip distance in km as arrays in row order.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.float64)
+        self._reserve(int(rows.max()) + 1)
+        stale = ((tick - self.tick[rows] >= self.refresh_every) |
+                 (np.abs(speed - self.speed[rows]) >= self.speed_delta) |
+                 (np.abs(distance - self.distance[rows]) >= self.distance_delta))
+        if force:
+            stale[:] = True
+        refresh = rows[stale]
+        if len(refresh):
+            self.speed[refresh] = speed[stale]
+            self.distance[refresh] = distance[stale]
+            self.tick[refresh] = tick
+            self.prediction[refresh] = self.predictor.predict_batch(
+                distance[stale], speed[stale], self.gas_type, self.AC, rain, sun)
+        self.predicted += len(refresh)
+        self.requested += len(rows)
+        return self.prediction[rows]
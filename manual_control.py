@@ -42,7 +42,7 @@ Use ARROWS or WASD keys for control.
     V            : Select next map layer (Shift+V reverse)
     B            : Load current selected map layer (Shift+B to unload)
 
-    R            : toggle recording images to disk
+    R            : toggle recording camera frames to disk (see frame_recorder.py)
 
     CTRL + R     : toggle recording of simulation (replacing any previous)
     CTRL + P     : start replaying last recorded simulation
@@ -143,6 +143,12 @@ try:
 except ImportError:
     raise RuntimeError('cannot import numpy, make sure numpy package is installed')
 
+from camera_frames import FrameStats, SurfaceFramePath
+from frame_recorder import FrameRecorder
+from lidar_raster import COLOR_MODES, LidarRasterizer
+from radar_points import RADAR_VIEWS, VELOCITY, RadarOverlay, decode_radar, radar_world_points, velocity_colors
+from sensor_decoding import SensorDecoder
+
 
 # ==============================================================================
 # -- Global functions ----------------------------------------------------------
@@ -185,6 +191,14 @@ def get_actor_blueprints(world, filter, generation):
         return []
 
 
+def lidar_decay(value):
+    # argparse type of --lidar-decay, the range LidarRasterizer accepts
+    decay = float(value)
+    if not 0.0 <= decay < 1.0:
+        raise argparse.ArgumentTypeError('lidar decay must be in [0, 1), got %s' % value)
+    return decay
+
+
 # ==============================================================================
 # -- World ---------------------------------------------------------------------
 # ==============================================================================
@@ -215,6 +229,10 @@ class World(object):
         self._actor_filter = args.filter
         self._actor_generation = args.generation
         self._gamma = args.gamma
+        self._lidar_view = (args.lidar_color, args.lidar_decay)
+        self._radar_view = args.radar_view
+        # sensor frames are decoded off the callback thread, see CameraManager
+        self.sensor_decoder = SensorDecoder(workers=2)
         self.restart()
         self.world.on_tick(hud.on_world_tick)
         self.recording_enabled = False
@@ -286,7 +304,7 @@ class World(object):
         self.lane_invasion_sensor = LaneInvasionSensor(self.player, self.hud)
         self.gnss_sensor = GnssSensor(self.player)
         self.imu_sensor = IMUSensor(self.player)
-        self.camera_manager = CameraManager(self.player, self.hud, self._gamma)
+        self.camera_manager = CameraManager(self.player, self.hud, self._gamma, self.sensor_decoder, *self._lidar_view)
         self.camera_manager.transform_index = cam_pos_index
         self.camera_manager.set_sensor(cam_index, notify=False)
         actor_type = get_actor_display_name(self.player)
@@ -321,7 +339,7 @@ class World(object):
 
     def toggle_radar(self):
         if self.radar_sensor is None:
-            self.radar_sensor = RadarSensor(self.player)
+            self.radar_sensor = RadarSensor(self.player, self.hud, self._radar_view)
         elif self.radar_sensor.sensor is not None:
             self.radar_sensor.sensor.destroy()
             self.radar_sensor = None
@@ -340,6 +358,8 @@ class World(object):
 
     def render(self, display):
         self.camera_manager.render(display)
+        if self.radar_sensor is not None:
+            self.radar_sensor.render(display)
         self.hud.render(display)
 
     def destroy_sensors(self):
@@ -350,6 +370,7 @@ class World(object):
     def destroy(self):
         if self.radar_sensor is not None:
             self.toggle_radar()
+        self.camera_manager.stop_recording()
         sensors = [
             self.camera_manager.sensor,
             self.collision_sensor.sensor,
@@ -708,6 +729,10 @@ class HUD(object):
         self._info_text = [
             'Server:  % 16.0f FPS' % self.server_fps,
             'Client:  % 16.0f FPS' % clock.get_fps(),
+            'Frame decode:    % 9.2f ms' % world.camera_manager.frame_stats.mean_decode_ms,
+            'Frame copies:    % 9.1f' % world.camera_manager.frame_stats.copies_per_frame,
+            'Frames dropped:  % 9d' % world.camera_manager.channel.dropped,
+            'Frames late:     % 9d' % world.camera_manager.channel.late,
             '',
             'Vehicle: % 20s' % get_actor_display_name(world.player, truncate=20),
             'Map:     % 20s' % world.map.name.split('/')[-1],
@@ -1012,19 +1037,30 @@ class IMUSensor(object):
 
 
 class RadarSensor(object):
-    def __init__(self, parent_actor):
+    def __init__(self, parent_actor, hud, view='debug', max_points=200, draw_interval=0.05):
         self.sensor = None
         self._parent = parent_actor
+        self.hud = hud
         bound_x = 0.5 + self._parent.bounding_box.extent.x
         bound_y = 0.5 + self._parent.bounding_box.extent.y
         bound_z = 0.5 + self._parent.bounding_box.extent.z
 
         self.velocity_range = 7.5 # m/s
+        # debug: points drawn in the simulator, at most `max_points` per sweep
+        # and one sweep every `draw_interval` seconds; overlay: drawn locally
+        self.view = view
+        self.max_points = max_points
+        self.draw_interval = draw_interval
+        self.last_draw = None
+        self.sweep = None
+        self.overlay = None
         world = self._parent.get_world()
         self.debug = world.debug
         bp = world.get_blueprint_library().find('sensor.other.radar')
         bp.set_attribute('horizontal_fov', str(35))
         bp.set_attribute('vertical_fov', str(20))
+        if view == 'overlay':
+            self.overlay = RadarOverlay(200, bp.get_attribute('range').as_float())
         self.sensor = world.spawn_actor(
             bp,
             carla.Transform(
@@ -1041,50 +1077,57 @@ class RadarSensor(object):
         self = weak_self()
         if not self:
             return
-        # To get a numpy [[vel, altitude, azimuth, depth],...[,,,]]:
-        # points = np.frombuffer(radar_data.raw_data, dtype=np.dtype('f4'))
-        # points = np.reshape(points, (len(radar_data), 4))
-
-        current_rot = radar_data.transform.rotation
-        for detect in radar_data:
-            azi = math.degrees(detect.azimuth)
-            alt = math.degrees(detect.altitude)
-            # The 0.25 adjusts a bit the distance so the dots can
-            # be properly seen
-            fw_vec = carla.Vector3D(x=detect.depth - 0.25)
-            carla.Transform(
-                carla.Location(),
-                carla.Rotation(
-                    pitch=current_rot.pitch + alt,
-                    yaw=current_rot.yaw + azi,
-                    roll=current_rot.roll)).transform(fw_vec)
-
-            def clamp(min_v, max_v, value):
-                return max(min_v, min(value, max_v))
-
-            norm_velocity = detect.velocity / self.velocity_range # range [-1, 1]
-            r = int(clamp(0.0, 1.0, 1.0 - norm_velocity) * 255.0)
-            g = int(clamp(0.0, 1.0, 1.0 - abs(norm_velocity)) * 255.0)
-            b = int(abs(clamp(- 1.0, 0.0, - 1.0 - norm_velocity)) * 255.0)
+        # [[vel, azimuth, altitude, depth],...[,,,]] in one array
+        points = decode_radar(radar_data.raw_data)
+        colors = velocity_colors(points[:, VELOCITY], self.velocity_range)
+        if self.overlay is not None:
+            # drawn by the render loop, the raw data does not outlive the callback
+            self.sweep = (points.copy(), colors)
+            return
+        if self.last_draw is not None and radar_data.timestamp - self.last_draw < self.draw_interval:
+            return
+        self.last_draw = radar_data.timestamp
+        if len(points) > self.max_points:
+            keep = np.linspace(0, len(points) - 1, self.max_points).astype(np.intp)
+            points = points[keep]
+            colors = colors[keep]
+        locations = radar_world_points(points, radar_data.transform)
+        life_time = max(0.06, self.draw_interval + 0.01)
+        for (x, y, z), (r, g, b) in zip(locations.tolist(), colors.tolist()):
             self.debug.draw_point(
-                radar_data.transform.location + fw_vec,
+                carla.Location(x, y, z),
                 size=0.075,
-                life_time=0.06,
+                life_time=life_time,
                 persistent_lines=False,
                 color=carla.Color(r, g, b))
 
+    def render(self, display):
+        sweep, self.sweep = self.sweep, None
+        if self.overlay is None:
+            return
+        if sweep is not None:
+            self.overlay.draw(*sweep)
+        self.overlay.render(display, (self.hud.dim[0] - self.overlay.size - 10, self.hud.dim[1] - self.overlay.size - 10))
+
 # ==============================================================================
 # -- CameraManager -------------------------------------------------------------
 # ==============================================================================
 
 
 class CameraManager(object):
-    def __init__(self, parent_actor, hud, gamma_correction):
+    def __init__(self, parent_actor, hud, gamma_correction, decoder, lidar_color='white', lidar_decay=0.0):
         self.sensor = None
-        self.surface = None
         self._parent = parent_actor
         self.hud = hud
-        self.recording = False
+        self.recorder = None
+        # camera frames go straight from the sensor buffer into reused Surfaces
+        self.frame_path = SurfaceFramePath()
+        self.frame_stats = FrameStats()
+        # the sensor callback only hands the frame to the decoder, which keeps
+        # the newest one and decodes it on a worker thread
+        weak_self = weakref.ref(self)
+        self.channel = decoder.channel(
+            'camera-%d' % id(self), lambda frame: CameraManager._decode(weak_self, frame))
         bound_x = 0.5 + self._parent.bounding_box.extent.x
         bound_y = 0.5 + self._parent.bounding_box.extent.y
         bound_z = 0.5 + self._parent.bounding_box.extent.z
@@ -1127,6 +1170,7 @@ class CameraManager(object):
         ]
         world = self._parent.get_world()
         bp_library = world.get_blueprint_library()
+        self.lidar = None
         for item in self.sensors:
             bp = bp_library.find(item[0])
             if item[0].startswith('sensor.camera'):
@@ -1143,6 +1187,8 @@ class CameraManager(object):
                     bp.set_attribute(attr_name, attr_value)
                     if attr_name == 'range':
                         self.lidar_range = float(attr_value)
+                self.lidar = LidarRasterizer(
+                    hud.dim[0], hud.dim[1], self.lidar_range, lidar_color, lidar_decay)
 
             item.append(bp)
         self.index = None
@@ -1158,7 +1204,9 @@ class CameraManager(object):
         if needs_respawn:
             if self.sensor is not None:
                 self.sensor.destroy()
-                self.surface = None
+                self.channel.reset()
+            if self.lidar is not None:
+                self.lidar.clear()
             self.sensor = self._parent.get_world().spawn_actor(
                 self.sensors[index][-1],
                 self._camera_transforms[self.transform_index][0],
@@ -1167,7 +1215,7 @@ class CameraManager(object):
             # We need to pass the lambda a weak reference to self to avoid
             # circular reference.
             weak_self = weakref.ref(self)
-            self.sensor.listen(lambda image: CameraManager._parse_image(weak_self, image))
+            self.sensor.listen(lambda image: CameraManager._parse_image(weak_self, index, image))
         if notify:
             self.hud.notification(self.sensors[index][2])
         self.index = index
@@ -1175,33 +1223,72 @@ class CameraManager(object):
     def next_sensor(self):
         self.set_sensor(self.index + 1)
 
+    @property
+    def recording(self):
+        return self.recorder is not None
+
     def toggle_recording(self):
-        self.recording = not self.recording
-        self.hud.notification('Recording %s' % ('On' if self.recording else 'Off'))
+        if self.recorder is None:
+            path = os.path.join('_out', datetime.datetime.now().strftime('recording-%Y%m%d-%H%M%S'))
+            self.recorder = FrameRecorder(path, self.hud.dim[0], self.hud.dim[1])
+            self.hud.notification('Recording On')
+        else:
+            frames = self.stop_recording()
+            self.hud.notification('Recording Off, %d frames' % frames)
+
+    def stop_recording(self):
+        # waits for the frames still queued to reach the disk
+        recorder, self.recorder = self.recorder, None
+        return recorder.close() if recorder is not None else 0
+
+    @property
+    def surface(self):
+        # freshest decoded frame
+        return self.channel.latest
 
     def render(self, display):
-        if self.surface is not None:
-            display.blit(self.surface, (0, 0))
+        surface = self.surface
+        if surface is not None:
+            display.blit(surface, (0, 0))
 
     @staticmethod
-    def _parse_image(weak_self, image):
+    def _parse_image(weak_self, index, image):
         self = weak_self()
         if not self:
             return
-        if self.sensors[self.index][0].startswith('sensor.lidar'):
-            points = np.frombuffer(image.raw_data, dtype=np.dtype('f4'))
-            points = np.reshape(points, (int(points.shape[0] / 4), 4))
-            lidar_data = np.array(points[:, :2])
-            lidar_data *= min(self.hud.dim) / (2.0 * self.lidar_range)
-            lidar_data += (0.5 * self.hud.dim[0], 0.5 * self.hud.dim[1])
-            lidar_data = np.fabs(lidar_data)  # pylint: disable=E1111
-            lidar_data = lidar_data.astype(np.int32)
-            lidar_data = np.reshape(lidar_data, (-1, 2))
-            lidar_img_size = (self.hud.dim[0], self.hud.dim[1], 3)
-            lidar_img = np.zeros((lidar_img_size), dtype=np.uint8)
-            lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
-            self.surface = pygame.surfarray.make_surface(lidar_img)
-        elif self.sensors[self.index][0].startswith('sensor.camera.dvs'):
+        recorder = self.recorder
+        converted = False
+        # recorded frames are never dropped, so they are handled here rather
+        # than behind the decoder's drop-oldest slot
+        if recorder is not None and self.sensors[index][0].startswith('sensor.camera') and \
+                not self.sensors[index][0].startswith('sensor.camera.dvs'):
+            # converted and queued to the recorder; the decoder shows the converted image
+            if self.sensors[index][0].startswith('sensor.camera.optical_flow'):
+                image = image.get_color_coded_flow()
+            else:
+                image.convert(self.sensors[index][1])
+            recorder.submit_image(image)
+            converted = True
+        elif recorder is not None:
+            # lidar and DVS frames are not images, they keep CARLA's own format
+            image.save_to_disk('_out/%08d' % image.frame)
+        # keeping the image referenced keeps its buffer alive until it is decoded
+        self.channel.submit(image.frame, (index, image, converted))
+
+    @staticmethod
+    def _decode(weak_self, frame):
+        self = weak_self()
+        if not self:
+            return None
+        index, image, converted = frame
+        with self.frame_stats.timed() as timer:
+            return self._parse_frame(index, image, converted, timer)
+
+    def _parse_frame(self, index, image, converted, frame):
+        if self.sensors[index][0].startswith('sensor.lidar'):
+            # bird's-eye view drawn into reused buffers, see lidar_raster.py
+            surface = self.lidar.sweep_surface(image.raw_data)
+        elif self.sensors[index][0].startswith('sensor.camera.dvs'):
             # Example of converting the raw_data from a carla.DVSEventArray
             # sensor into a NumPy array and using it as an image
             dvs_events = np.frombuffer(image.raw_data, dtype=np.dtype([
@@ -1209,23 +1296,17 @@ class CameraManager(object):
             dvs_img = np.zeros((image.height, image.width, 3), dtype=np.uint8)
             # Blue is positive, red is negative
             dvs_img[dvs_events[:]['y'], dvs_events[:]['x'], dvs_events[:]['pol'] * 2] = 255
-            self.surface = pygame.surfarray.make_surface(dvs_img.swapaxes(0, 1))
-        elif self.sensors[self.index][0].startswith('sensor.camera.optical_flow'):
-            image = image.get_color_coded_flow()
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+            surface = pygame.surfarray.make_surface(dvs_img.swapaxes(0, 1))
+        elif self.sensors[index][0].startswith('sensor.camera.optical_flow'):
+            if not converted:
+                image = image.get_color_coded_flow()
+            surface, frame.copies = self.frame_path.image_surface(image)
         else:
-            image.convert(self.sensors[self.index][1])
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            self.surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
-        if self.recording:
-            image.save_to_disk('_out/%08d' % image.frame)
+            if not converted:
+                image.convert(self.sensors[index][1])
+            # BGRA bytes copied once into a staging Surface, no slicing or swapping
+            surface, frame.copies = self.frame_path.image_surface(image)
+        return surface
 
 
 # ==============================================================================
@@ -1295,6 +1376,7 @@ def game_loop(args):
 
         if world is not None:
             world.destroy()
+            world.sensor_decoder.close()
 
         pygame.quit()
 
@@ -1352,6 +1434,21 @@ def main():
         default=2.2,
         type=float,
         help='Gamma correction of the camera (default: 2.2)')
+    argparser.add_argument(
+        '--lidar-color',
+        default='white',
+        choices=COLOR_MODES,
+        help='Color of the lidar points (default: white)')
+    argparser.add_argument(
+        '--lidar-decay',
+        default=0.0,
+        type=lidar_decay,
+        help='Fade earlier lidar sweeps by this factor per sweep instead of clearing them, in [0, 1) (default: 0)')
+    argparser.add_argument(
+        '--radar-view',
+        default='debug',
+        choices=RADAR_VIEWS,
+        help='Draw radar detections in the simulator or as a client-side overlay (default: debug)')
     argparser.add_argument(
         '--sync',
         action='store_true',
@@ -1,11 +1,101 @@
-import pandas as pd
-import joblib
+import os
+import warnings
+
+import numpy as np
+
+from models.registry import MODELS_DIR, CompactGradientBoosting, registry
+
+MODEL_PATH = os.path.join(MODELS_DIR, 'gradient_boosting_model.pkl')
+
+# model feature -> (predictor input, one-hot value or None for a numeric input)
+FEATURES = {
+    'distance': ('distance', None),
+    'speed': ('speed', None),
+    'gas_type_E10': ('gas_type', 0),
+    'gas_type_SP98': ('gas_type', 1),
+    'AC_0': ('AC', 0),
+    'AC_1': ('AC', 1),
+    'rain_0': ('rain', 0),
+    'rain_1': ('rain', 1),
+    'sun_0': ('sun', 0),
+    'sun_1': ('sun', 1),
+}
+INPUTS = ('distance', 'speed', 'gas_type', 'AC', 'rain', 'sun')
+
+
+def load_model(model_path=None):
+    # a model name or path, cached by the registry; by default the compact
+    # export of the checkpoint when there is one, else the pickle itself
+    return registry.get(model_path)
+
+
+class FeatureEncoder():
+    """
+    Encodes predictor inputs into the model's feature matrix without pandas.
+
+    The column layout is checked once against the model's feature_names_in_,
+    then rows are written straight into a reused float32 buffer (the dtype
+    the trees compare in). The returned matrix is a view of that buffer and
+    is overwritten by the next call, so one encoder serves one thread.
+    """
+
+    def __init__(self, feature_names=None, capacity=1):
+        feature_names = list(FEATURES) if feature_names is None else [str(x) for x in feature_names]
+        unknown = [x for x in feature_names if x not in FEATURES]
+        if unknown:
+            raise ValueError('model expects unknown features %s' % ', '.join(unknown))
+        self.feature_names = feature_names
+        # per input, the numeric column or the one-hot (column, value) pairs
+        self.numeric = {}
+        self.one_hot = {name: [] for name in INPUTS}
+        for column, name in enumerate(feature_names):
+            source, value = FEATURES[name]
+            if value is None:
+                self.numeric[source] = column
+            else:
+                self.one_hot[source].append((column, value))
+        self.buffer = np.zeros((capacity, len(feature_names)), dtype=np.float32)
+
+    def _reserve(self, rows):
+        if rows > len(self.buffer):
+            self.buffer = np.zeros((max(rows, 2 * len(self.buffer)), self.buffer.shape[1]), dtype=np.float32)
+        return self.buffer[:rows]
+
+    def encode_one(self, distance, speed, gas_type, AC, rain, sun):
+        row = self._reserve(1)
+        values = {'distance': distance, 'speed': speed, 'gas_type': gas_type, 'AC': AC, 'rain': rain, 'sun': sun}
+        for name, column in self.numeric.items():
+            row[0, column] = values[name]
+        for name, columns in self.one_hot.items():
+            for column, value in columns:
+                row[0, column] = values[name] == value
+        return row
+
+    def encode(self, distance, speed, gas_type, AC, rain, sun):
+        # one row per element of the inputs; scalars are broadcast, so constant
+        # flags can be passed as plain ints
+        inputs = dict(zip(INPUTS, np.broadcast_arrays(distance, speed, gas_type, AC, rain, sun)))
+        features = self._reserve(inputs['distance'].size)
+        for name, column in self.numeric.items():
+            features[:, column] = inputs[name].ravel()
+        for name, columns in self.one_hot.items():
+            for column, value in columns:
+                np.equal(inputs[name].ravel(), value, out=features[:, column], casting='unsafe')
+        return features
+
 
 class FuelConsumptionPredictor:
-    def __init__(self):
-        self.model = joblib.load(r'C:\Users\Aakhil\Desktop\hackathons\khacks\CARLA_0.9.14\WindowsNoEditor\Scripts\models\model_checkpoints\gradient_boosting_model.pkl')
+    def __init__(self, model_path=None, cache=None):
+        self.model = load_model(model_path)
+        self.encoder = FeatureEncoder(getattr(self.model, 'feature_names_in_', None))
+        # sklearn checks the feature names, the compact export does not
+        self.sklearn_model = not isinstance(self.model, CompactGradientBoosting)
+        # optional PredictionCache, predictions are then made at quantized distance and speed
+        self.cache = cache
 
     def preprocess_data(self, distance, speed, gas_type, AC, rain, sun):
+        # the single-row features as a DataFrame, for inspection; predict does not use it
+        import pandas as pd
         data = pd.DataFrame({
             'distance': [distance],
             'speed': [speed],
@@ -18,9 +108,73 @@ class FuelConsumptionPredictor:
             'sun_0': [1 if sun == 0 else 0],
             'sun_1': [1 if sun == 1 else 0],
         })
-        return data
+        return data[self.encoder.feature_names]
+
+    def _model_predict(self, features):
+        if not self.sklearn_model:
+            return self.model.predict(features)
+        # The model was fitted on a DataFrame; features are plain NumPy matrices
+        # laid out in the same column order, so the feature-name warning is noise.
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            return self.model.predict(features)
+
+    def preprocess_batch(self, distance, speed, gas_type, AC, rain, sun):
+        # a copy, the encoder's own buffer is reused by the next call
+        return self.encoder.encode(distance, speed, gas_type, AC, rain, sun).copy()
 
     def predict(self, distance, speed, gas_type, AC, rain, sun):
-        preprocessed_data = self.preprocess_data(distance, speed, gas_type, AC, rain, sun)
-        prediction = self.model.predict(preprocessed_data)
+        if self.cache is not None:
+            distance_bin, speed_bin, distance, speed = self.cache.quantize(distance, speed)
+            key = (int(distance_bin), int(speed_bin), int(gas_type), int(AC), int(rain), int(sun))
+            prediction = self.cache.get(key)
+            if prediction is None:
+                features = self.encoder.encode_one(float(distance), float(speed), gas_type, AC, rain, sun)
+                prediction = self._model_predict(features)[0]
+                self.cache.put(key, prediction)
+            return prediction
+        features = self.encoder.encode_one(distance, speed, gas_type, AC, rain, sun)
+        prediction = self._model_predict(features)
         return prediction[0]
+
+    def predict_batch(self, distance, speed, gas_type, AC, rain, sun):
+        # Predicts for a whole fleet in a single model call, returns an array
+        # with one fuel consumption value per row.
+        if self.cache is not None:
+            return self._predict_batch_cached(distance, speed, gas_type, AC, rain, sun)
+        features = self.encoder.encode(distance, speed, gas_type, AC, rain, sun)
+        if len(features) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self._model_predict(features)
+
+    def _predict_batch_cached(self, distance, speed, gas_type, AC, rain, sun):
+        # rows are looked up one by one, the misses are predicted in one model
+        # call; a key missing more than once in the batch is predicted once
+        distance, speed, gas_type, AC, rain, sun = np.broadcast_arrays(distance, speed, gas_type, AC, rain, sun)
+        distance_bin, speed_bin, _, _ = self.cache.quantize(distance.ravel(), speed.ravel())
+        keys = zip(distance_bin.tolist(), speed_bin.tolist(),
+                   *[np.asarray(x).ravel().astype(np.int64).tolist() for x in (gas_type, AC, rain, sun)])
+        predictions = np.empty(distance_bin.size, dtype=np.float64)
+        missing = {}
+        repeats = 0
+        for n, key in enumerate(keys):
+            rows = missing.get(key)
+            if rows is not None:
+                rows.append(n)
+                repeats += 1
+                continue
+            prediction = self.cache.get(key)
+            if prediction is None:
+                missing[key] = [n]
+            else:
+                predictions[n] = prediction
+        # a repeated miss is served by the one prediction made for its key
+        self.cache.count_hits(repeats)
+        if missing:
+            unique = np.array(list(missing), dtype=np.int64)
+            features = self.encoder.encode(unique[:, 0] * self.cache.distance_step, unique[:, 1] * self.cache.speed_step,
+                                           unique[:, 2], unique[:, 3], unique[:, 4], unique[:, 5])
+            for (key, rows), prediction in zip(missing.items(), self._model_predict(features).tolist()):
+                predictions[rows] = prediction
+                self.cache.put(key, prediction)
+        return predictions
@@ -0,0 +1,92 @@
+"""
+Pure-NumPy inference for gradient-boosted regression trees.
+
+All trees are evaluated together, level by level, over a chunk of feature
+rows. Every tree is laid out as a complete binary tree of depth `max_depth`
+(a leaf above the last level is repeated below itself), so the node at each
+level is just a position 0..2**level-1 and moving down is `2 * position +
+go_right`. Arrays are tree-major, (trees, rows), which keeps every step a
+contiguous vectorized operation.
+
+Results match scikit-learn's GradientBoostingRegressor.predict exactly:
+features are float32 as in sklearn, the float64 thresholds are rounded down
+to float32 (x <= t and x <= float32_floor(t) agree for every float32 x), and
+the scaled stage values are accumulated in tree order, as predict_stages does.
+"""
+
+import numpy as np
+
+
+def _float32_floor(values):
+    # largest float32 not greater than each float64 value
+    rounded = values.astype(np.float32)
+    return np.where(rounded > values, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+
+
+class TreeEnsembleKernel():
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, init, learning_rate,
+                 chunk_rows=256):
+        children = np.stack([left, right], axis=1).astype(np.intp)
+        feature = np.asarray(feature, dtype=np.intp)
+        threshold = np.asarray(threshold, dtype=np.float64)
+        n_trees = len(roots)
+        self.n_trees = n_trees
+        self.max_depth = int(max_depth)
+        self.init = float(init)
+        self.n_features = None
+        # rows evaluated at a time, keeps the (trees, rows) temporaries in cache
+        self.chunk_rows = chunk_rows
+
+        # per level, the feature and threshold of every (tree, position), flattened
+        self.level_feature = []
+        self.level_threshold = []
+        node = np.asarray(roots, dtype=np.intp)[:, None]
+        for _ in range(self.max_depth):
+            self.level_feature.append(feature[node].ravel())
+            self.level_threshold.append(_float32_floor(threshold[node].ravel())[:, None])
+            node = children[node].reshape(n_trees, -1)
+        self.leaf_value = learning_rate * np.asarray(value, dtype=np.float64)[node].ravel()
+        self.tree = np.arange(n_trees, dtype=np.intp)[:, None]
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """From a CompactGradientBoosting or a fitted GradientBoostingRegressor."""
+        if hasattr(model, 'estimators_'):
+            from models.registry import CompactGradientBoosting
+            model = CompactGradientBoosting.from_sklearn(model)
+        kernel = cls(model.feature, model.threshold, model.left, model.right, model.value, model.roots,
+                     model.max_depth, model.init, model.learning_rate, **kwargs)
+        kernel.n_features = model.n_features_in_
+        return kernel
+
+    def _predict_chunk(self, X, out):
+        XT = X.T
+        n = XT.shape[1]
+        columns = np.arange(n, dtype=np.intp)
+        position = np.zeros((self.n_trees, n), dtype=np.intp)
+        for level in range(self.max_depth):
+            # compare every node of the level, then pick each tree's current one
+            go_right = np.take(XT, self.level_feature[level], axis=0) > self.level_threshold[level]
+            index = ((self.tree << level) + position) * n
+            index += columns
+            position <<= 1
+            position += np.take(go_right, index)
+        position += self.tree << self.max_depth
+        stages = np.empty((self.n_trees + 1, n), dtype=np.float64)
+        stages[0] = self.init
+        np.take(self.leaf_value, position, out=stages[1:])
+        out[:] = np.cumsum(stages, axis=0)[-1]
+
+    def predict(self, X, out=None):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if self.n_features is not None and X.shape[1] != self.n_features:
+            raise ValueError('expected %d features, got shape %r' % (self.n_features, X.shape))
+        if out is None:
+            out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.chunk_rows):
+            stop = start + self.chunk_rows
+            self._predict_chunk(X[start:stop], out[start:stop])
+        return out
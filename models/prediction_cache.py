@@ -0,0 +1,110 @@
+import collections
+
+import numpy as np
+
+# predictor inputs that are quantized, the flags (gas_type, AC, rain, sun) are used as they are
+QUANTIZED = ('distance', 'speed')
+
+
+class PredictionCache():
+    """
+    Bounded memo of fuel predictions keyed on quantized inputs.
+
+    distance and speed are rounded to `distance_step` / `speed_step`, and
+    the model is evaluated at the rounded values, so every query that falls
+    in a bin gets the same prediction no matter which one filled the entry.
+    `policy` is 'lru' (evict the least recently used entry) or 'lfu' (the
+    least frequently used, ties broken by age). Use it by passing it to
+    FuelConsumptionPredictor(cache=...).
+    """
+
+    def __init__(self, capacity=4096, distance_step=1.0, speed_step=1.0, policy='lru'):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError('unknown cache policy %r' % policy)
+        self.capacity = capacity
+        self.distance_step = distance_step
+        self.speed_step = speed_step
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # lru: key -> value, oldest first
+        self.values = collections.OrderedDict()
+        # lfu: key -> use count, and per count the keys with that count, oldest first
+        self.counts = {}
+        self.by_count = collections.defaultdict(collections.OrderedDict)
+        self.min_count = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hit_rate}
+
+    def count_hits(self, n=1):
+        # lookups answered without get(), e.g. repeats of a key within one batch
+        self.hits += n
+
+    def clear(self):
+        self.values.clear()
+        self.counts.clear()
+        self.by_count.clear()
+        self.min_count = 0
+
+    def quantize(self, distance, speed):
+        # bin indices, and the bin values the model is evaluated at
+        distance_bin = np.rint(np.asarray(distance, dtype=np.float64) / self.distance_step).astype(np.int64)
+        speed_bin = np.rint(np.asarray(speed, dtype=np.float64) / self.speed_step).astype(np.int64)
+        return distance_bin, speed_bin, distance_bin * self.distance_step, speed_bin * self.speed_step
+
+    def _touch(self, key):
+        if self.policy == 'lru':
+            self.values.move_to_end(key)
+            return
+        count = self.counts[key]
+        bucket = self.by_count[count]
+        del bucket[key]
+        if not bucket:
+            del self.by_count[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        self.counts[key] = count + 1
+        self.by_count[count + 1][key] = None
+
+    def get(self, key):
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key)
+        return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        if key in self.values:
+            self.values[key] = value
+            self._touch(key)
+            return
+        if len(self.values) >= self.capacity:
+            if self.policy == 'lru':
+                self.values.popitem(last=False)
+            else:
+                evicted, _ = self.by_count[self.min_count].popitem(last=False)
+                if not self.by_count[self.min_count]:
+                    del self.by_count[self.min_count]
+                del self.counts[evicted]
+                del self.values[evicted]
+            self.evictions += 1
+        self.values[key] = value
+        if self.policy == 'lfu':
+            self.counts[key] = 1
+            self.by_count[1][key] = None
+            self.min_count = 1
@@ -0,0 +1,213 @@
+"""
+Model artifacts of the package and an in-process cache of loaded models.
+
+Models are looked up by name in model_checkpoints/ next to this file, so they
+resolve the same way on every machine; any existing path works as well:
+
+    model = load_model('gradient_boosting_model')
+    model = load_model('/data/other_model.pkl')
+
+A fitted GradientBoostingRegressor can be exported to a compact directory of
+flat NumPy node arrays (<name>.trees). These are memory-mapped on load, which
+takes milliseconds, and CompactGradientBoosting predicts from them without
+importing scikit-learn. A name resolves to its .trees export before the
+pickle, so exporting a checkpoint is all that is needed to use it:
+
+    python -m models.registry export gradient_boosting_model
+"""
+
+import argparse
+import collections
+import json
+import os
+import threading
+
+import numpy as np
+
+from models.gbt_kernel import TreeEnsembleKernel
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_checkpoints')
+DEFAULT_MODEL = 'gradient_boosting_model'
+
+COMPACT_SUFFIX = '.trees'
+COMPACT_FORMAT = 'gbt-flat-v1'
+
+
+def resolve(name=None):
+    """Returns the artifact path for a model name or path, the compact export first."""
+    name = name or DEFAULT_MODEL
+    if os.path.exists(name):
+        return os.path.abspath(name)
+    stem = os.path.join(MODELS_DIR, name)
+    for path in (stem + COMPACT_SUFFIX, stem + '.pkl', stem):
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError('no model %r in %s' % (name, MODELS_DIR))
+
+
+class CompactGradientBoosting():
+    """
+    A GradientBoostingRegressor as flat node arrays.
+
+    The nodes of all trees are concatenated and child indices are global.
+    Leaves point to themselves, so every tree can be descended for exactly
+    `max_depth` steps. Predictions go through models.gbt_kernel and match
+    scikit-learn's.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+    def __init__(self, feature, threshold, left, right, value, roots, init, learning_rate,
+                 max_depth, feature_names_in_):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.init = init
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.feature_names_in_ = np.asarray(feature_names_in_, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.kernel = None
+
+    @classmethod
+    def from_sklearn(cls, model):
+        if model.init_ == 'zero':
+            init = 0.0
+        elif type(model.init_).__name__ == 'DummyRegressor':
+            init = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise ValueError('cannot export init estimator %r' % model.init_)
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(leaf, nodes, tree.children_right) + offset)
+            value.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(np.concatenate(feature).astype(np.int32), np.concatenate(threshold).astype(np.float64),
+                   np.concatenate(left).astype(np.int32), np.concatenate(right).astype(np.int32),
+                   np.concatenate(value).astype(np.float64), np.asarray(roots, dtype=np.int32),
+                   init, float(model.learning_rate),
+                   max(estimator.tree_.max_depth for estimator in model.estimators_[:, 0]),
+                   getattr(model, 'feature_names_in_', ['x%d' % n for n in range(model.n_features_in_)]))
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+        meta = {
+            'format': COMPACT_FORMAT,
+            'init': self.init,
+            'learning_rate': self.learning_rate,
+            'max_depth': self.max_depth,
+            'feature_names_in_': [str(x) for x in self.feature_names_in_],
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.pop('format', None) != COMPACT_FORMAT:
+            raise ValueError('%s is not a %s model' % (path, COMPACT_FORMAT))
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None)
+                  for name in cls.ARRAYS}
+        return cls(**arrays, **meta)
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def predict(self, X):
+        if self.kernel is None:
+            self.kernel = TreeEnsembleKernel.from_model(self)
+        return self.kernel.predict(X)
+
+
+def export_compact(model, path):
+    """Writes a fitted GradientBoostingRegressor to `path` in the compact format."""
+    compact = CompactGradientBoosting.from_sklearn(model)
+    compact.save(path)
+    return compact
+
+
+def _load(path):
+    if os.path.isdir(path):
+        return CompactGradientBoosting.load(path)
+    import joblib
+    return joblib.load(path)
+
+
+class ModelRegistry():
+    """Loaded models by artifact path, the least recently used evicted beyond `capacity`."""
+
+    def __init__(self, capacity=4):
+        self.capacity = capacity
+        self.models = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.models)
+
+    def get(self, name=None):
+        path = resolve(name)
+        with self.lock:
+            model = self.models.get(path)
+            if model is not None:
+                self.models.move_to_end(path)
+                self.hits += 1
+                return model
+        # loaded outside the lock, two threads may both load a model the first time
+        model = _load(path)
+        with self.lock:
+            self.misses += 1
+            self.models[path] = model
+            self.models.move_to_end(path)
+            while len(self.models) > self.capacity:
+                self.models.popitem(last=False)
+                self.evictions += 1
+        return model
+
+    def clear(self):
+        with self.lock:
+            self.models.clear()
+
+
+registry = ModelRegistry()
+
+
+def load_model(name=None):
+    return registry.get(name)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = argparser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help='export a pickled model to the compact format')
+    export.add_argument('model', nargs='?', default=DEFAULT_MODEL, help='model name or pickle path')
+    export.add_argument('-o', '--output', help='output directory (default: next to the pickle, %s)' % COMPACT_SUFFIX)
+    args = argparser.parse_args()
+
+    import joblib
+    source = args.model if os.path.exists(args.model) else os.path.join(MODELS_DIR, args.model + '.pkl')
+    model = joblib.load(source)
+    output = args.output or os.path.splitext(source)[0] + COMPACT_SUFFIX
+    compact = export_compact(model, output)
+    print('exported %d trees (%d nodes) to %s' % (compact.n_estimators, len(compact.value), output))
+
+
+if __name__ == '__main__':
+    main()
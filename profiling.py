@@ -0,0 +1,185 @@
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+
+PHASES = [
+    "tick wait",
+    "actor fetch",
+    "physics read",
+    "odometer update",
+    "model inference",
+    "sink write",
+]
+
+# histogram bins are log-spaced from 1 us to 100 s
+HISTOGRAM_BINS = 256
+_MIN_NS = 1e3
+_MAX_NS = 1e11
+
+
+class _NullPhase():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfiler():
+    """Profiler used when instrumentation is off, every call is a no-op."""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def record(self, name, start_ns, end_ns):
+        pass
+
+    def summary(self):
+        return {}
+
+    def report(self):
+        pass
+
+    def dump(self, path):
+        pass
+
+
+class _Phase():
+    __slots__ = ('profiler', 'index', 'start')
+
+    def __init__(self, profiler, index):
+        self.profiler = profiler
+        self.index = index
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.index, self.start, time.perf_counter_ns())
+        return False
+
+
+class TickProfiler():
+    """
+    Per-phase timings of the traffic loop.
+
+    Durations go into fixed-size log-spaced histograms (one row per phase),
+    so memory does not grow with run length and percentiles are read from
+    the histograms. The first `max_events` phase spans are also kept, with
+    their thread, for a Chrome trace or speedscope dump. Phases may be
+    recorded from several threads (the tick pipeline's worker and the main
+    thread); updates go through a lock.
+    """
+
+    enabled = True
+
+    def __init__(self, phases=PHASES, max_events=1 << 18):
+        self.phases = list(phases)
+        self.index = {name: n for n, name in enumerate(self.phases)}
+        self.edges = np.geomspace(_MIN_NS, _MAX_NS, HISTOGRAM_BINS + 1)
+        self.histograms = np.zeros((len(self.phases), HISTOGRAM_BINS + 2), dtype=np.int64)
+        self.totals = np.zeros(len(self.phases), dtype=np.int64)
+        self.max_events = max_events
+        self.events = np.zeros((max_events, 4), dtype=np.int64)  # phase, thread, start ns, end ns
+        self.event_count = 0
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+
+    def phase(self, name):
+        return _Phase(self, self.index[name])
+
+    def record(self, name, start_ns, end_ns):
+        self._record(self.index[name], start_ns, end_ns)
+
+    def _record(self, index, start, end):
+        duration = end - start
+        bin = np.searchsorted(self.edges, duration)
+        ident = threading.get_ident()
+        with self.lock:
+            self.histograms[index, bin] += 1
+            self.totals[index] += duration
+            n = self.event_count
+            if n < self.max_events:
+                thread = self.threads.setdefault(ident, len(self.threads))
+                self.events[n] = (index, thread, start - self.origin, end - self.origin)
+                self.event_count = n + 1
+
+    def _recorded_events(self):
+        with self.lock:
+            return self.events[:self.event_count].copy()
+
+    def percentile(self, name, q):
+        # upper edge of the bin holding the q-th percentile, in seconds
+        with self.lock:
+            counts = self.histograms[self.index[name]].copy()
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+        bin = int(np.searchsorted(np.cumsum(counts), q / 100.0 * total))
+        return self.edges[min(bin, HISTOGRAM_BINS)] / 1e9
+
+    def summary(self):
+        summary = {}
+        with self.lock:
+            counts = self.histograms.sum(axis=1)
+            totals = self.totals.copy()
+        for name, n in self.index.items():
+            summary[name] = {
+                "count": int(counts[n]),
+                "total": totals[n] / 1e9,
+                "p50": self.percentile(name, 50),
+                "p95": self.percentile(name, 95),
+                "p99": self.percentile(name, 99),
+            }
+        return summary
+
+    def report(self):
+        lines = ['%-16s %8s %10s %10s %10s %10s' % ('phase', 'count', 'total s', 'p50 ms', 'p95 ms', 'p99 ms')]
+        for name, s in self.summary().items():
+            lines.append('%-16s %8d %10.3f %10.3f %10.3f %10.3f' % (
+                name, s["count"], s["total"], 1000 * s["p50"], 1000 * s["p95"], 1000 * s["p99"]))
+        logging.info('tick profile:\n%s', '\n'.join(lines))
+
+    def dump(self, path):
+        # *.speedscope.json writes a speedscope file, anything else a Chrome trace
+        if path.endswith('.speedscope.json'):
+            data = self._speedscope()
+        else:
+            data = self._chrome_trace()
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    def _chrome_trace(self):
+        events = [{"name": self.phases[phase], "ph": "X", "pid": 0, "tid": int(thread),
+                   "ts": start / 1e3, "dur": (end - start) / 1e3}
+                  for phase, thread, start, end in self._recorded_events().tolist()]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def _speedscope(self):
+        events = self._recorded_events()
+        profiles = []
+        for thread in sorted(set(events[:, 1].tolist())):
+            spans = events[events[:, 1] == thread]
+            spans = spans[np.argsort(spans[:, 2], kind='stable')]
+            timeline = []
+            for phase, _, start, end in spans.tolist():
+                timeline.append({"type": "O", "frame": phase, "at": start})
+                timeline.append({"type": "C", "frame": phase, "at": end})
+            profiles.append({
+                "type": "evented", "name": "thread %d" % thread, "unit": "nanoseconds",
+                "startValue": int(spans[0, 2]), "endValue": int(spans[-1, 3]), "events": timeline})
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in self.phases]},
+            "profiles": profiles,
+        }
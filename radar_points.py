@@ -0,0 +1,86 @@
+import numpy as np
+import pygame
+
+from camera_frames import BGRX_MASKS
+
+# columns of a decoded carla.RadarMeasurement, the order of the detection
+# struct in its raw_data (velocity m/s, azimuth rad, altitude rad, depth m)
+VELOCITY, AZIMUTH, ALTITUDE, DEPTH = range(4)
+
+RADAR_VIEWS = ('debug', 'overlay')
+
+
+def decode_radar(raw_data):
+    # (N, 4) float32 view of the detections, no copy
+    return np.frombuffer(raw_data, dtype=np.float32).reshape(-1, 4)
+
+
+def radar_world_points(points, transform, depth_offset=-0.25):
+    """
+    (N, 3) world positions of the detections of a sweep taken at `transform`.
+
+    Each detection lies `depth` meters along the sensor's forward vector
+    turned by its azimuth and altitude, as carla.Rotation.transform() would
+    place it; roll does not move a forward vector. `depth_offset` pulls the
+    points slightly towards the sensor so they are not hidden by the surface
+    they were detected on.
+    """
+    rotation = transform.rotation
+    pitch = np.radians(rotation.pitch) + points[:, ALTITUDE]
+    yaw = np.radians(rotation.yaw) + points[:, AZIMUTH]
+    depth = points[:, DEPTH] + depth_offset
+    flat = depth * np.cos(pitch)
+    location = transform.location
+    return np.stack([location.x + flat * np.cos(yaw),
+                     location.y + flat * np.sin(yaw),
+                     location.z + depth * np.sin(pitch)], axis=1)
+
+
+def velocity_colors(velocity, velocity_range):
+    """
+    (N, 3) uint8 colors of detections by radial velocity: white when still,
+    red when approaching and blue when moving away at `velocity_range` m/s.
+    """
+    norm = velocity / velocity_range
+    colors = np.empty((len(norm), 3), dtype=np.uint8)
+    colors[:, 0] = np.clip(1.0 - norm, 0.0, 1.0) * 255.0
+    colors[:, 1] = np.clip(1.0 - np.abs(norm), 0.0, 1.0) * 255.0
+    colors[:, 2] = np.clip(-1.0 - norm, -1.0, 0.0) * -255.0
+    return colors
+
+
+class RadarOverlay():
+    """
+    Client-side top view of the last radar sweep, drawn without any RPC.
+
+    The sensor sits at the bottom middle of a `size` pixel square looking up;
+    `radar_range` meters reach its top edge. Detections are `dot` pixel
+    squares in their velocity color.
+    """
+
+    def __init__(self, size, radar_range, dot=3):
+        self.size = size
+        self.scale = (size - 1) / radar_range
+        self.dot = dot
+        self.image = np.zeros((size, size), dtype=np.uint32)
+        self.surface = pygame.Surface((size, size), 0, 32, BGRX_MASKS)
+        self.surface.set_alpha(200)
+
+    def draw(self, points, colors):
+        self.image.fill(0x202020)
+        flat = points[:, DEPTH] * np.cos(points[:, ALTITUDE]) * self.scale
+        # forward is up, positive azimuth (to the right) is right
+        x = (0.5 * self.size + flat * np.sin(points[:, AZIMUTH])).astype(np.intp)
+        y = (self.size - 1 - flat * np.cos(points[:, AZIMUTH])).astype(np.intp)
+        packed = (colors[:, 0].astype(np.uint32) << 16) | (colors[:, 1].astype(np.uint32) << 8) | colors[:, 2]
+        half = self.dot // 2
+        for dy in range(-half, self.dot - half):
+            for dx in range(-half, self.dot - half):
+                px = x + dx
+                py = y + dy
+                inside = (px >= 0) & (px < self.size) & (py >= 0) & (py < self.size)
+                self.image[py[inside], px[inside]] = packed[inside]
+        pygame.surfarray.blit_array(self.surface, self.image.T)
+
+    def render(self, display, pos):
+        display.blit(self.surface, pos)
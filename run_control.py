@@ -0,0 +1,92 @@
+import json
+import os
+
+import numpy as np
+
+
+class RunProgress():
+    """Cumulative counters of a (possibly resumed) traffic run."""
+
+    def __init__(self, ticks=0, samples=0, sim_seconds=0.0, distance=0.0, fuel_consumption=0.0, frame=None):
+        self.ticks = ticks
+        self.samples = samples
+        self.sim_seconds = sim_seconds
+        self.distance = distance
+        self.fuel_consumption = fuel_consumption
+        self.frame = frame
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return 'RunProgress(%s)' % ', '.join('%s=%r' % item for item in vars(self).items())
+
+
+class RunLimits():
+    """
+    When a traffic run stops.
+
+    `ticks`, `sim_seconds`, `distance` (metres driven by the whole fleet) and
+    `predicate` (called with the RunProgress, stops when it returns True) size
+    the whole run and count across resumes; the run stops at the first limit
+    reached. `chunk_ticks` only bounds a single start_traffic call, so a long
+    run can be collected in chunks with checkpoints in between.
+    """
+
+    def __init__(self, ticks=None, sim_seconds=None, distance=None, predicate=None, chunk_ticks=None):
+        self.ticks = ticks
+        self.sim_seconds = sim_seconds
+        self.distance = distance
+        self.predicate = predicate
+        self.chunk_ticks = chunk_ticks
+
+    def finished(self, progress):
+        return ((self.ticks is not None and progress.ticks >= self.ticks) or
+                (self.sim_seconds is not None and progress.sim_seconds >= self.sim_seconds) or
+                (self.distance is not None and progress.distance >= self.distance) or
+                (self.predicate is not None and bool(self.predicate(progress))))
+
+    def should_stop(self, progress, chunk_start_tick):
+        if self.chunk_ticks is not None and progress.ticks - chunk_start_tick >= self.chunk_ticks:
+            return True
+        return self.finished(progress)
+
+
+def save_checkpoint(path, progress, vehicle_state, fleet):
+    """
+    Saves `progress` and the state of the vehicles in `fleet` (actor ids in
+    spawn order); rows of the registry for any other actor are left out.
+    """
+    # written to a temporary file first so an interrupted save keeps the old checkpoint
+    rows = vehicle_state.rows(fleet)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f,
+                 progress=np.array(json.dumps(progress.as_dict())),
+                 actor_ids=vehicle_state.actor_ids[rows],
+                 odometer=vehicle_state.odometer[rows],
+                 fuel_consumption=vehicle_state.fuel_consumption[rows],
+                 previous_location=vehicle_state.previous_location[rows])
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path, vehicle_state=None, fleet=()):
+    """
+    Returns the RunProgress saved in `path`.
+
+    A resumed run spawns a new fleet, so vehicles are matched by their place
+    in the fleet rather than by actor id: the n-th actor of `fleet` takes
+    over the odometer and fuel of the checkpoint's n-th vehicle in
+    `vehicle_state`. Vehicles beyond the checkpoint's start from zero, and
+    saved vehicles without a counterpart are dropped. Register the actors'
+    current locations afterwards so odometers continue from where the new
+    vehicles are.
+    """
+    with np.load(path) as data:
+        progress = RunProgress(**json.loads(str(data['progress'])))
+        if vehicle_state is not None:
+            for n, actor_id in enumerate(list(fleet)[:len(data['odometer'])]):
+                row = vehicle_state.register(actor_id, data['previous_location'][n])
+                vehicle_state.odometer[row] = data['odometer'][n]
+                vehicle_state.fuel_consumption[row] = data['fuel_consumption'][n]
+    return progress
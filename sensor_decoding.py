@@ -0,0 +1,145 @@
+import collections
+import logging
+import threading
+import time
+import weakref
+
+
+class SensorChannel():
+    """
+    One sensor's path through a SensorDecoder.
+
+    The sensor callback only calls submit(); the frame waits in a single slot
+    until a worker picks it up, and a newer frame replaces it (drop-oldest).
+    A sensor is decoded by one worker at a time, and `latest` is the result of
+    the newest frame decoded so far.
+
+    Counters: `dropped` frames were replaced in the slot before being decoded,
+    `late` frames were still being decoded when the next one arrived, i.e.
+    the decoder is not keeping up with the sensor. reset() forgets the
+    latest result, and frames submitted before it are never published.
+    """
+
+    def __init__(self, decoder, name, decode):
+        self.decoder = decoder
+        self.name = name
+        self.decode = decode
+        self.pending = None
+        self.queued = False
+        self.busy = False
+        self.latest = None
+        self.latest_frame = None
+        self.generation = 0
+        self.received = 0
+        self.decoded = 0
+        self.dropped = 0
+        self.late = 0
+        self.errors = 0
+        self.decode_seconds = 0.0
+
+    def submit(self, frame, payload):
+        self.decoder._submit(self, frame, payload)
+
+    def reset(self):
+        with self.decoder.condition:
+            self.generation += 1
+            self.pending = None
+            self.latest = None
+            self.latest_frame = None
+
+    def counters(self):
+        return {'received': self.received, 'decoded': self.decoded, 'dropped': self.dropped,
+                'late': self.late, 'errors': self.errors}
+
+
+class SensorDecoder():
+    """
+    A small pool of threads decoding sensor frames off the callback thread.
+
+        decoder = SensorDecoder(workers=2)
+        channel = decoder.channel('camera', decode)
+        sensor.listen(lambda image: channel.submit(image.frame, image))
+        ...
+        surface = channel.latest
+    """
+
+    def __init__(self, workers=2):
+        self.condition = threading.Condition()
+        self.ready = collections.deque()
+        self.channels = weakref.WeakValueDictionary()
+        self.closed = False
+        self.threads = [threading.Thread(target=self._run, name='sensor-decoder-%d' % n, daemon=True)
+                        for n in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def channel(self, name, decode):
+        channel = SensorChannel(self, name, decode)
+        self.channels[name] = channel
+        return channel
+
+    def stats(self):
+        # per sensor counters, see SensorChannel
+        return {name: channel.counters() for name, channel in list(self.channels.items())}
+
+    def _submit(self, channel, frame, payload):
+        with self.condition:
+            channel.received += 1
+            if channel.pending is not None:
+                channel.dropped += 1
+            elif channel.busy:
+                channel.late += 1
+            channel.pending = (channel.generation, frame, payload)
+            if not channel.busy and not channel.queued:
+                channel.queued = True
+                self.ready.append(channel)
+                self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.ready and not self.closed:
+                    self.condition.wait()
+                if not self.ready:
+                    return
+                channel = self.ready.popleft()
+                channel.queued = False
+                if channel.pending is None:
+                    # reset() while it was waiting
+                    continue
+                generation, frame, payload = channel.pending
+                channel.pending = None
+                channel.busy = True
+
+            start = time.perf_counter()
+            try:
+                result = channel.decode(payload)
+                failed = False
+            except Exception:
+                logging.exception('decoding %s frame %d failed', channel.name, frame)
+                failed = True
+            seconds = time.perf_counter() - start
+
+            with self.condition:
+                channel.busy = False
+                channel.decode_seconds += seconds
+                if failed:
+                    channel.errors += 1
+                else:
+                    channel.decoded += 1
+                    if generation == channel.generation and (
+                            channel.latest_frame is None or frame > channel.latest_frame):
+                        channel.latest = result
+                        channel.latest_frame = frame
+                if channel.pending is not None and not channel.queued:
+                    channel.queued = True
+                    self.ready.append(channel)
+                    self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.ready.clear()
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
@@ -0,0 +1,298 @@
+"""
+Run GenerateTraffic on several CARLA servers at once and merge the telemetry.
+
+Each shard is a worker process driving its own GenerateTraffic against one
+server / Traffic Manager port pair with its own seed. Workers stream their
+telemetry through a shared-memory ring buffer; the coordinator drains all
+rings into a single dataset with a "shard" column.
+
+    python sharded_traffic.py --shard 127.0.0.1:2000:8000 --shard 127.0.0.1:3000:9000 -o fleet.parquet
+    python sharded_traffic.py --stub --shard localhost:2000:8000 --shard localhost:2001:8001
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from run_control import RunLimits
+from sinks import open_sink
+from telemetry import VEHICLE_FIELDS, TelemetryBuffer
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stubs')
+
+SHARD_FIELDS = VEHICLE_FIELDS + [("shard", np.int32)]
+
+
+class SharedRingBuffer():
+    """
+    Single-producer, single-consumer ring of telemetry records in shared memory.
+
+    The header holds the total number of records written (head), read (tail),
+    a closed flag set by the producer and a cancelled flag set by the
+    consumer; records are a structured array of the telemetry fields. The
+    producer only moves head and the consumer only moves tail. A producer
+    blocked on a full ring raises once the consumer cancels it.
+    """
+
+    HEADER_SIZE = 4 * 8
+
+    def __init__(self, capacity, fields=VEHICLE_FIELDS, name=None):
+        self.capacity = capacity
+        self.dtype = np.dtype(list(fields))
+        create = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=create, size=self.HEADER_SIZE + capacity * self.dtype.itemsize)
+        self.name = self.shm.name
+        self.header = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray((capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=self.HEADER_SIZE)
+        if create:
+            self.header[:] = 0
+
+    @property
+    def closed(self):
+        return bool(self.header[2])
+
+    @property
+    def cancelled(self):
+        return bool(self.header[3])
+
+    def __len__(self):
+        return int(self.header[0] - self.header[1])
+
+    def write(self, columns, poll=0.001):
+        # blocks while the ring is full
+        rows = len(next(iter(columns.values())))
+        written = 0
+        while written < rows:
+            if self.cancelled:
+                raise RuntimeError('telemetry ring was cancelled by its reader')
+            head = int(self.header[0])
+            free = self.capacity - (head - int(self.header[1]))
+            if free == 0:
+                time.sleep(poll)
+                continue
+            n = min(free, rows - written)
+            slots = (head + np.arange(n)) % self.capacity
+            for name in self.dtype.names:
+                self.records[name][slots] = np.asarray(columns[name])[written:written + n]
+            self.header[0] = head + n
+            written += n
+
+    def read(self, max_rows=None):
+        tail = int(self.header[1])
+        n = int(self.header[0]) - tail
+        if max_rows is not None:
+            n = min(n, max_rows)
+        records = self.records[(tail + np.arange(n)) % self.capacity]
+        self.header[1] = tail + n
+        return records
+
+    def close_writer(self):
+        self.header[2] = 1
+
+    def cancel(self):
+        # the reader stops draining, the writer must not wait for it
+        self.header[3] = 1
+
+    def close(self):
+        del self.header, self.records
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class RingBufferWriter():
+    # telemetry writer (see sinks.py) that feeds a SharedRingBuffer
+    def __init__(self, ring):
+        self.ring = ring
+
+    def write_batch(self, columns):
+        self.ring.write(columns)
+
+    def close(self):
+        self.ring.close_writer()
+
+
+def _run_shard(shard_index, host, port, tm_port, seed, ring_name, ring_capacity, use_stub, kwargs):
+    if use_stub:
+        sys.path.insert(0, STUBS)
+    from generate_traffic import GenerateTraffic
+
+    logging.basicConfig(format='shard %d %%(levelname)s: %%(message)s' % shard_index, level=logging.INFO)
+    ring = SharedRingBuffer(ring_capacity, name=ring_name)
+    try:
+        traffic = GenerateTraffic(host=host, port=port, tm_port=tm_port, seed=seed,
+                                  telemetry_writer=RingBufferWriter(ring), keep_telemetry=False, **kwargs)
+        traffic.start_traffic()
+    finally:
+        ring.close_writer()
+        ring.close()
+
+
+class ShardedTraffic():
+    """
+    Coordinator for sharded traffic runs.
+
+    `shards` is a list of (host, port, tm_port) tuples; shard i is seeded with
+    `seed + i`. Any other GenerateTraffic argument goes in `traffic_kwargs`.
+    With `use_stub` the workers import the headless carla stand-in instead of
+    the real client, which allows running everything locally.
+    """
+
+    def __init__(self, shards, seed=0, traffic_kwargs=None, ring_capacity=1 << 16, use_stub=False):
+        self.shards = list(shards)
+        self.seed = seed
+        self.traffic_kwargs = traffic_kwargs or {}
+        self.ring_capacity = ring_capacity
+        self.use_stub = use_stub
+
+    def run(self, output=None, keep_telemetry=True, poll=0.005, stop_timeout=30.0):
+        """
+        Runs all shards to completion and returns the merged TelemetryBuffer
+        (None when keep_telemetry is False). Merged batches are also streamed
+        to `output` when a path is given.
+
+        If the coordinator fails (or is interrupted) the rings are cancelled
+        so the workers stop and clean up their actors; workers still running
+        after `stop_timeout` seconds are terminated.
+        """
+        merged = TelemetryBuffer(SHARD_FIELDS) if keep_telemetry else None
+        sink = None
+        rings = []
+        workers = []
+        finished = False
+        try:
+            for n, (host, port, tm_port) in enumerate(self.shards):
+                ring = SharedRingBuffer(self.ring_capacity)
+                rings.append(ring)
+                worker = multiprocessing.Process(
+                    target=_run_shard, name='traffic-shard-%d' % n,
+                    args=(n, host, port, tm_port, self.seed + n, ring.name, self.ring_capacity,
+                          self.use_stub, self.traffic_kwargs))
+                worker.start()
+                workers.append(worker)
+            # the sink may start a writer thread, forking after it would copy a process mid-write
+            if output is not None:
+                sink = open_sink(output)
+
+            pending = set(range(len(rings)))
+            while pending:
+                idle = True
+                for n in list(pending):
+                    # read the closed flag first so no record written before it is missed
+                    done = rings[n].closed or not workers[n].is_alive()
+                    records = rings[n].read()
+                    if len(records):
+                        idle = False
+                        columns = {name: records[name] for name in records.dtype.names}
+                        columns["shard"] = np.full(len(records), n, dtype=np.int32)
+                        if merged is not None:
+                            merged.append_batch(columns)
+                        if sink is not None:
+                            sink.write(columns)
+                    elif done:
+                        pending.discard(n)
+                if idle:
+                    time.sleep(poll)
+            finished = True
+        finally:
+            if not finished:
+                for ring in rings:
+                    ring.cancel()
+            for worker in workers:
+                worker.join(None if finished else stop_timeout)
+                if worker.is_alive():
+                    logging.warning('%s did not stop, terminating it', worker.name)
+                    worker.terminate()
+                    worker.join()
+            for ring in rings:
+                ring.close()
+                ring.unlink()
+            if sink is not None:
+                sink.close()
+
+        failed = [n for n, worker in enumerate(workers) if worker.exitcode != 0]
+        if failed:
+            raise RuntimeError('traffic shards %s exited with an error' % ', '.join(map(str, failed)))
+        return merged
+
+
+def parse_shard(text):
+    host, port, tm_port = text.rsplit(':', 2)
+    return host, int(port), int(tm_port)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument(
+        '--shard',
+        metavar='HOST:PORT:TM_PORT',
+        action='append',
+        type=parse_shard,
+        required=True,
+        help='CARLA server and Traffic Manager port of one shard (repeat for each shard)')
+    argparser.add_argument(
+        '-n', '--number-of-vehicles',
+        metavar='N',
+        default=30,
+        type=int,
+        help='number of vehicles per shard (default: 30)')
+    argparser.add_argument(
+        '-w', '--number-of-walkers',
+        metavar='W',
+        default=10,
+        type=int,
+        help='number of walkers per shard (default: 10)')
+    argparser.add_argument(
+        '-t', '--ticks',
+        metavar='T',
+        default=10000,
+        type=int,
+        help='ticks per shard (default: 10000)')
+    argparser.add_argument(
+        '-s', '--seed',
+        default=0,
+        type=int,
+        help='seed of the first shard, shard i uses seed + i (default: 0)')
+    argparser.add_argument(
+        '-o', '--output',
+        default='vehicle_data.csv',
+        help='merged telemetry file, .csv, .ndjson or .parquet (default: vehicle_data.csv)')
+    argparser.add_argument(
+        '--model',
+        default=None,
+        help='fuel model checkpoint')
+    argparser.add_argument(
+        '--stub',
+        action='store_true',
+        help='run against the headless carla stand-in in stubs/')
+    args = argparser.parse_args()
+
+    logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+    traffic_kwargs = {
+        'number_of_vehicles': args.number_of_vehicles,
+        'number_of_walkers': args.number_of_walkers,
+        'log_every': 0,
+        'run_limits': RunLimits(ticks=args.ticks),
+        'model_path': args.model,
+    }
+    coordinator = ShardedTraffic(args.shard, seed=args.seed, traffic_kwargs=traffic_kwargs, use_stub=args.stub)
+    start = time.time()
+    coordinator.run(output=args.output, keep_telemetry=False)
+    logging.info('%d shards finished in %.1f s, telemetry written to %s',
+                 len(args.shard), time.time() - start, args.output)
+
+
+if __name__ == '__main__':
+
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('\nCancelled by user. Bye!')
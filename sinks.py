@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+
+class CsvTelemetryWriter():
+    # with append=True rows are added to an existing file in its header's column order
+    def __init__(self, path, append=False):
+        self.fieldnames = None
+        if append and os.path.exists(path) and os.path.getsize(path):
+            with open(path, newline='') as f:
+                self.fieldnames = next(csv.reader(f))
+        self.file = open(path, 'a' if append else 'w', newline='')
+        self.writer = csv.writer(self.file)
+
+    def write_batch(self, columns):
+        if self.fieldnames is None:
+            self.fieldnames = list(columns)
+            self.writer.writerow(self.fieldnames)
+        elif set(self.fieldnames) != set(columns):
+            raise ValueError('telemetry columns do not match the header of %s' % self.file.name)
+        self.writer.writerows(zip(*(np.asarray(columns[f]).tolist() for f in self.fieldnames)))
+
+    def close(self):
+        self.file.close()
+
+
+class NdjsonTelemetryWriter():
+    def __init__(self, path, append=False):
+        self.file = open(path, 'a' if append else 'w')
+
+    def write_batch(self, columns):
+        fieldnames = list(columns)
+        for row in zip(*(np.asarray(columns[f]).tolist() for f in fieldnames)):
+            self.file.write(json.dumps(dict(zip(fieldnames, row))))
+            self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetTelemetryWriter():
+    # needs pyarrow, one row group is written every `ticks_per_row_group` batches
+    def __init__(self, path, ticks_per_row_group=100, append=False):
+        if append:
+            raise ValueError('parquet telemetry cannot be appended to, give each resumed run its own path')
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError('cannot import pyarrow, make sure pyarrow package is installed')
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.ticks_per_row_group = ticks_per_row_group
+        self.pending = []
+        self.writer = None
+
+    def write_batch(self, columns):
+        self.pending.append(columns)
+        if len(self.pending) >= self.ticks_per_row_group:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        fieldnames = list(self.pending[0])
+        table = self.pa.table({f: np.concatenate([np.asarray(b[f]) for b in self.pending]) for f in fieldnames})
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table, row_group_size=table.num_rows)
+        self.pending = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {
+    'csv': CsvTelemetryWriter,
+    'ndjson': NdjsonTelemetryWriter,
+    'jsonl': NdjsonTelemetryWriter,
+    'parquet': ParquetTelemetryWriter,
+}
+
+
+class TelemetrySink():
+    """
+    Streams telemetry column batches to a writer on a background thread.
+
+    write() only enqueues the batch; when the bounded queue is full it blocks,
+    so a slow disk throttles the producer instead of growing memory. Batches
+    must not be modified after they are handed to write().
+    """
+
+    def __init__(self, writer, max_queue=64):
+        self.writer = writer
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.error = None
+        self.batches = 0
+        self.rows = 0
+        self.thread = threading.Thread(target=self._run, name='telemetry-sink', daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while True:
+            columns = self.queue.get()
+            if columns is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.writer.write_batch(columns)
+            except Exception as e:
+                self.error = e
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError('telemetry writer failed: %s' % self.error) from self.error
+
+    def write(self, columns):
+        self._check()
+        rows = len(next(iter(columns.values()))) if columns else 0
+        if rows == 0:
+            return
+        self.queue.put(columns)
+        self.batches += 1
+        self.rows += rows
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+            self.writer.close()
+        self._check()
+
+
+def open_sink(path, format=None, max_queue=64, **kwargs):
+    # the format defaults to the file extension (.csv, .ndjson/.jsonl, .parquet);
+    # append=True continues an existing csv or ndjson file
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip('.').lower()
+    try:
+        writer_class = WRITERS[format]
+    except KeyError:
+        raise ValueError('unknown telemetry format %r, use one of: %s' % (format, ', '.join(sorted(WRITERS))))
+    return TelemetrySink(writer_class(path, **kwargs), max_queue=max_queue)
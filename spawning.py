@@ -0,0 +1,202 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import carla
+
+
+class BulkSpawner():
+    """
+    Spawns vehicles and walkers in a bounded number of batched round-trips.
+
+    Spawns go through apply_batch_sync, and failed spawns are retried on
+    spare spawn points or navigation locations (one batch per retry round).
+    Calls the API has no batch command for (get_random_location_from_navigation
+    and the walker AI controller start/go_to_location/set_max_speed) are
+    issued from a small thread pool, so their round-trips overlap instead of
+    running one after another; each walker still costs its own calls.
+    `rpc_calls` counts every call made to the simulator (a batch is one),
+    `waves` the sequential round-trips: batches plus waves of concurrent calls.
+
+    With a `lifecycle` (an ActorLifecycleManager) every actor is tracked as
+    soon as its batch comes back, so a spawn that fails half-way leaves
+    nothing behind once the manager closes.
+    """
+
+    def __init__(self, client, world, max_retries=3, rpc_workers=16, min_walker_separation=1.0, lifecycle=None):
+        self.client = client
+        self.world = world
+        self.lifecycle = lifecycle
+        self.max_retries = max_retries
+        self.rpc_workers = rpc_workers
+        self.min_walker_separation = min_walker_separation
+        self.rpc_calls = 0
+        self.waves = 0
+        self._locations = []
+        self._occupied = set()
+
+    def _parallel(self, fn, items, calls_per_item=1):
+        # every item makes calls_per_item calls, rpc_workers of them overlap per wave
+        items = list(items)
+        if not items:
+            return []
+        self.rpc_calls += calls_per_item * len(items)
+        self.waves += calls_per_item * -(-len(items) // max(1, self.rpc_workers))
+        if self.rpc_workers <= 1:
+            return [fn(x) for x in items]
+        with ThreadPoolExecutor(self.rpc_workers) as executor:
+            return list(executor.map(fn, items))
+
+    def _apply_batch(self, batch, do_tick):
+        self.rpc_calls += 1
+        self.waves += 1
+        return self.client.apply_batch_sync(batch, do_tick)
+
+    def prefetch_locations(self, count):
+        # keeps a pool of navigation locations; missing ones are fetched concurrently
+        missing = count - len(self._locations)
+        if missing > 0:
+            fetched = self._parallel(lambda _: self.world.get_random_location_from_navigation(), range(missing))
+            self._locations.extend(x for x in fetched if x is not None)
+        return len(self._locations)
+
+    def take_locations(self, count):
+        # count locations from the pool, refilling it with some headroom when it runs short
+        if len(self._locations) < count:
+            self.prefetch_locations(count + count // 4 + 1)
+        taken, self._locations = self._locations[:count], self._locations[count:]
+        return taken
+
+    def _free_walker_location(self, location):
+        # locations closer than min_walker_separation to another walker are dropped
+        cell = (round(location.x / self.min_walker_separation), round(location.y / self.min_walker_separation))
+        if cell in self._occupied:
+            return False
+        self._occupied.add(cell)
+        return True
+
+    def _take_walker_locations(self, count):
+        locations = []
+        for _ in range(self.max_retries + 1):
+            locations.extend(x for x in self.take_locations(count - len(locations)) if self._free_walker_location(x))
+            if len(locations) >= count:
+                break
+        return locations
+
+    def spawn_vehicles(self, requests, spawn_points, tm_port, do_tick):
+        """
+        Spawns one autopilot vehicle per request, a (blueprint, attributes)
+        pair, on the first spawn points; vehicles that fail to spawn are
+        retried on the remaining points. Returns the spawned actor ids.
+        """
+        SpawnActor = carla.command.SpawnActor
+        SetAutopilot = carla.command.SetAutopilot
+        FutureActor = carla.command.FutureActor
+
+        free_points = list(spawn_points[len(requests):])
+        pending = list(zip(requests, spawn_points))
+        vehicles = []
+        for attempt in range(self.max_retries + 1):
+            batch = []
+            for (blueprint, attributes), transform in pending:
+                for key, value in attributes.items():
+                    blueprint.set_attribute(key, value)
+                batch.append(SpawnActor(blueprint, transform)
+                    .then(SetAutopilot(FutureActor, True, tm_port)))
+            failed = []
+            spawned = []
+            for (request, transform), response in zip(pending, self._apply_batch(batch, do_tick)):
+                if response.error:
+                    logging.debug('vehicle spawn failed: %s', response.error)
+                    failed.append(request)
+                else:
+                    spawned.append(response.actor_id)
+            if self.lifecycle is not None:
+                self.lifecycle.track_vehicles(spawned)
+            vehicles.extend(spawned)
+            if not failed or attempt == self.max_retries or not free_points:
+                break
+            pending = list(zip(failed, free_points))
+            free_points = free_points[len(pending):]
+        if len(vehicles) < len(requests):
+            logging.warning('could only spawn %d of %d vehicles', len(vehicles), len(requests))
+        return vehicles
+
+    def spawn_walkers(self, requests, do_tick=True):
+        """
+        Spawns one walker per request, a (blueprint, attributes, max_speed)
+        tuple, at random navigation locations, then one AI controller per
+        walker. Failed walkers are retried at other locations and walkers
+        whose controller fails are destroyed again. Returns a list of
+        {"id", "con", "speed"} dicts.
+        """
+        SpawnActor = carla.command.SpawnActor
+
+        walkers = []
+        pending = list(requests)
+        for attempt in range(self.max_retries + 1):
+            locations = self._take_walker_locations(len(pending))
+            batch = []
+            for (blueprint, attributes, _), location in zip(pending, locations):
+                for key, value in attributes.items():
+                    blueprint.set_attribute(key, value)
+                batch.append(SpawnActor(blueprint, carla.Transform(location)))
+            failed = pending[len(locations):]
+            spawned = []
+            for request, response in zip(pending, self._apply_batch(batch, do_tick)):
+                if response.error:
+                    logging.debug('walker spawn failed: %s', response.error)
+                    failed.append(request)
+                else:
+                    spawned.append({"id": response.actor_id, "speed": request[2]})
+            if self.lifecycle is not None:
+                self.lifecycle.track_walkers(spawned)
+            walkers.extend(spawned)
+            if not failed:
+                break
+            pending = failed
+        if len(walkers) < len(requests):
+            logging.warning('could only spawn %d of %d walkers', len(walkers), len(requests))
+
+        controller_bp = self.world.get_blueprint_library().find('controller.ai.walker')
+        self.rpc_calls += 1
+        self.waves += 1
+        batch = [SpawnActor(controller_bp, carla.Transform(), walker["id"]) for walker in walkers]
+        spawned = []
+        orphans = []
+        for walker, response in zip(walkers, self._apply_batch(batch, do_tick)):
+            if response.error:
+                logging.error(response.error)
+                orphans.append(walker["id"])
+            else:
+                walker["con"] = response.actor_id
+                spawned.append(walker)
+        if self.lifecycle is not None:
+            self.lifecycle.track_controllers([walker["con"] for walker in spawned])
+        if orphans:
+            self._apply_batch([carla.command.DestroyActor(x) for x in orphans], False)
+            if self.lifecycle is not None:
+                self.lifecycle.release(orphans)
+        return spawned
+
+    def start_walkers(self, walkers):
+        """
+        Starts every walker controller towards a random destination at its
+        max speed. The destinations come from the prefetched location pool.
+        """
+        controllers = self.world.get_actors([walker["con"] for walker in walkers])
+        self.rpc_calls += 1
+        self.waves += 1
+        by_id = {actor.id: actor for actor in controllers}
+        destinations = self.take_locations(len(walkers))
+
+        def start(item):
+            walker, destination = item
+            controller = by_id[walker["con"]]
+            # start walker
+            controller.start()
+            # set walk to random point
+            controller.go_to_location(destination)
+            # max speed
+            controller.set_max_speed(float(walker["speed"]))
+
+        self._parallel(start, zip(walkers, destinations), calls_per_item=3)
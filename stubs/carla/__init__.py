@@ -0,0 +1,848 @@
+"""
+Headless stand-in for the CARLA Python API.
+
+Implements the subset of `carla` used by generate_traffic.py on top of a
+simple kinematic motion model, so the telemetry loop can be run and
+benchmarked without a simulator or GPU. Put the `stubs` directory first on
+sys.path to use it in place of the real module:
+
+    sys.path.insert(0, 'stubs')
+    import carla
+
+Every call that is a server round-trip in the real API goes through
+`_rpc()`, which sleeps for the configured latency and is counted:
+
+    carla.set_rpc_latency(0.0002)
+    carla.reset_rpc_count()
+    ...
+    carla.rpc_count()
+"""
+
+import fnmatch
+import math
+import random
+import threading
+import time
+
+from . import command
+
+__version__ = '0.9.14-stub'
+
+_rpc_latency = 0.0
+_rpc_calls = 0
+_rpc_lock = threading.Lock()
+
+
+def set_rpc_latency(seconds):
+    global _rpc_latency
+    _rpc_latency = seconds
+
+
+def rpc_count():
+    return _rpc_calls
+
+
+def reset_rpc_count():
+    global _rpc_calls
+    _rpc_calls = 0
+
+
+def _rpc():
+    global _rpc_calls
+    with _rpc_lock:
+        _rpc_calls += 1
+    if _rpc_latency > 0.0:
+        time.sleep(_rpc_latency)
+
+
+# ==============================================================================
+# -- geometry ------------------------------------------------------------------
+# ==============================================================================
+
+
+class Vector2D():
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return 'Vector2D(x=%g, y=%g)' % (self.x, self.y)
+
+
+class Vector3D():
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def distance(self, other):
+        return math.sqrt((self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2)
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __eq__(self, other):
+        return (isinstance(other, Vector3D) and
+                (self.x, self.y, self.z) == (other.x, other.y, other.z))
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __repr__(self):
+        return '%s(x=%g, y=%g, z=%g)' % (type(self).__name__, self.x, self.y, self.z)
+
+
+class Location(Vector3D):
+    pass
+
+
+class Rotation():
+    def __init__(self, pitch=0.0, yaw=0.0, roll=0.0):
+        self.pitch = pitch
+        self.yaw = yaw
+        self.roll = roll
+
+    def get_forward_vector(self):
+        yaw = math.radians(self.yaw)
+        pitch = math.radians(self.pitch)
+        return Vector3D(math.cos(pitch) * math.cos(yaw), math.cos(pitch) * math.sin(yaw), math.sin(pitch))
+
+    def __repr__(self):
+        return 'Rotation(pitch=%g, yaw=%g, roll=%g)' % (self.pitch, self.yaw, self.roll)
+
+
+class Transform():
+    def __init__(self, location=None, rotation=None):
+        self.location = location if location is not None else Location()
+        self.rotation = rotation if rotation is not None else Rotation()
+
+    def get_forward_vector(self):
+        return self.rotation.get_forward_vector()
+
+    def __repr__(self):
+        return 'Transform(%r, %r)' % (self.location, self.rotation)
+
+
+def _copy_transform(transform):
+    location = transform.location
+    rotation = transform.rotation
+    return Transform(Location(location.x, location.y, location.z),
+                     Rotation(rotation.pitch, rotation.yaw, rotation.roll))
+
+
+# ==============================================================================
+# -- controls and settings -----------------------------------------------------
+# ==============================================================================
+
+
+class VehicleControl():
+    def __init__(self, throttle=0.0, steer=0.0, brake=0.0, hand_brake=False,
+                 reverse=False, manual_gear_shift=False, gear=0):
+        self.throttle = throttle
+        self.steer = steer
+        self.brake = brake
+        self.hand_brake = hand_brake
+        self.reverse = reverse
+        self.manual_gear_shift = manual_gear_shift
+        self.gear = gear
+
+
+class GearPhysicsControl():
+    def __init__(self, ratio=1.0, down_ratio=0.5, up_ratio=0.65):
+        self.ratio = ratio
+        self.down_ratio = down_ratio
+        self.up_ratio = up_ratio
+
+
+class WheelPhysicsControl():
+    def __init__(self, tire_friction=3.5, damping_rate=0.25, max_steer_angle=70.0,
+                 radius=35.5, max_brake_torque=1500.0, max_handbrake_torque=3000.0):
+        self.tire_friction = tire_friction
+        self.damping_rate = damping_rate
+        self.max_steer_angle = max_steer_angle
+        self.radius = radius
+        self.max_brake_torque = max_brake_torque
+        self.max_handbrake_torque = max_handbrake_torque
+
+
+class VehiclePhysicsControl():
+    def __init__(self, torque_curve=None, max_rpm=5000.0, moi=1.0, damping_rate_full_throttle=0.15,
+                 final_ratio=4.0, forward_gears=None, mass=1000.0, drag_coefficient=0.3, wheels=None):
+        self.torque_curve = torque_curve if torque_curve is not None else [Vector2D(0.0, 500.0), Vector2D(5000.0, 500.0)]
+        self.max_rpm = max_rpm
+        self.moi = moi
+        self.damping_rate_full_throttle = damping_rate_full_throttle
+        self.final_ratio = final_ratio
+        self.forward_gears = forward_gears if forward_gears is not None else [GearPhysicsControl()]
+        self.mass = mass
+        self.drag_coefficient = drag_coefficient
+        self.wheels = wheels if wheels is not None else [WheelPhysicsControl() for _ in range(4)]
+
+
+class WorldSettings():
+    def __init__(self, synchronous_mode=False, no_rendering_mode=False, fixed_delta_seconds=None):
+        self.synchronous_mode = synchronous_mode
+        self.no_rendering_mode = no_rendering_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+
+    def __eq__(self, other):
+        return (isinstance(other, WorldSettings) and
+                (self.synchronous_mode, self.no_rendering_mode, self.fixed_delta_seconds) ==
+                (other.synchronous_mode, other.no_rendering_mode, other.fixed_delta_seconds))
+
+
+class WeatherParameters():
+    def __init__(self, cloudiness=0.0, precipitation=0.0, precipitation_deposits=0.0, wind_intensity=0.0,
+                 sun_azimuth_angle=0.0, sun_altitude_angle=45.0, fog_density=0.0, wetness=0.0):
+        self.cloudiness = cloudiness
+        self.precipitation = precipitation
+        self.precipitation_deposits = precipitation_deposits
+        self.wind_intensity = wind_intensity
+        self.sun_azimuth_angle = sun_azimuth_angle
+        self.sun_altitude_angle = sun_altitude_angle
+        self.fog_density = fog_density
+        self.wetness = wetness
+
+    def __eq__(self, other):
+        return isinstance(other, WeatherParameters) and vars(self) == vars(other)
+
+
+WeatherParameters.ClearNoon = WeatherParameters(cloudiness=5.0, sun_altitude_angle=75.0)
+WeatherParameters.CloudyNoon = WeatherParameters(cloudiness=60.0, sun_altitude_angle=75.0)
+WeatherParameters.HardRainNoon = WeatherParameters(cloudiness=100.0, precipitation=100.0, wetness=100.0,
+                                                   sun_altitude_angle=75.0)
+WeatherParameters.ClearNight = WeatherParameters(cloudiness=5.0, sun_altitude_angle=-90.0)
+WeatherParameters.Default = WeatherParameters.ClearNoon
+
+
+class VehicleLightState():
+    NONE = 0
+    Position = 1
+    LowBeam = 2
+    HighBeam = 4
+    Brake = 8
+    RightBlinker = 16
+    LeftBlinker = 32
+    Reverse = 64
+    Fog = 128
+    Interior = 256
+    Special1 = 512
+    Special2 = 1024
+    All = 0xFFFFFFFF
+
+
+# ==============================================================================
+# -- blueprints ----------------------------------------------------------------
+# ==============================================================================
+
+
+class ActorAttribute():
+    def __init__(self, id, value, recommended_values=()):
+        self.id = id
+        self.value = str(value)
+        self.recommended_values = list(recommended_values)
+
+    def as_str(self):
+        return self.value
+
+    def as_int(self):
+        return int(self.value)
+
+    def as_float(self):
+        return float(self.value)
+
+    def __int__(self):
+        return int(self.value)
+
+    def __float__(self):
+        return float(self.value)
+
+    def __str__(self):
+        return self.value
+
+    def __eq__(self, other):
+        if isinstance(other, ActorAttribute):
+            return self.value == other.value
+        return self.value == str(other)
+
+
+class ActorBlueprint():
+    def __init__(self, id, tags=(), attributes=(), physics=None):
+        self.id = id
+        self.tags = list(tags)
+        self._attributes = {a.id: a for a in attributes}
+        self._physics = physics
+
+    def has_attribute(self, id):
+        return id in self._attributes
+
+    def get_attribute(self, id):
+        return self._attributes[id]
+
+    def set_attribute(self, id, value):
+        self._attributes[id].value = str(value)
+
+    def __iter__(self):
+        return iter(self._attributes.values())
+
+
+class BlueprintLibrary():
+    def __init__(self, blueprints):
+        self._blueprints = list(blueprints)
+
+    def filter(self, wildcard_pattern):
+        return [bp for bp in self._blueprints if fnmatch.fnmatch(bp.id, wildcard_pattern)]
+
+    def find(self, id):
+        for bp in self._blueprints:
+            if bp.id == id:
+                return bp
+        raise IndexError('blueprint %r not found' % id)
+
+    def __iter__(self):
+        return iter(self._blueprints)
+
+    def __len__(self):
+        return len(self._blueprints)
+
+
+def _vehicle_physics(max_rpm, mass, gears, final_ratio, radius, drag):
+    curve = [Vector2D(0.0, 400.0), Vector2D(max_rpm * 0.3, 500.0), Vector2D(max_rpm, 400.0)]
+    return VehiclePhysicsControl(
+        torque_curve=curve, max_rpm=max_rpm, moi=1.0, final_ratio=final_ratio,
+        forward_gears=[GearPhysicsControl(ratio) for ratio in gears], mass=mass,
+        drag_coefficient=drag, wheels=[WheelPhysicsControl(radius=radius) for _ in range(4)])
+
+
+def _default_blueprints():
+    vehicles = [
+        ('vehicle.audi.a2', 1, _vehicle_physics(5000.0, 1100.0, [3.5, 2.1, 1.4, 1.0, 0.8], 4.0, 31.0, 0.3)),
+        ('vehicle.audi.etron', 2, _vehicle_physics(6000.0, 2300.0, [3.2, 2.0, 1.3, 1.0, 0.8, 0.7], 3.7, 37.0, 0.28)),
+        ('vehicle.audi.tt', 1, _vehicle_physics(7000.0, 1400.0, [4.0, 2.4, 1.6, 1.2, 1.0], 4.1, 32.5, 0.32)),
+        ('vehicle.tesla.model3', 2, _vehicle_physics(8000.0, 1800.0, [9.0], 1.0, 34.0, 0.23)),
+    ]
+    blueprints = []
+    for id, generation, physics in vehicles:
+        blueprints.append(ActorBlueprint(id, tags=id.split('.')[1:], physics=physics, attributes=[
+            ActorAttribute('generation', generation),
+            ActorAttribute('base_type', 'car'),
+            ActorAttribute('color', '0,0,0', ['0,0,0', '255,255,255', '200,20,20']),
+            ActorAttribute('role_name', 'autopilot'),
+        ]))
+    for n in range(1, 11):
+        blueprints.append(ActorBlueprint('walker.pedestrian.%04d' % n, attributes=[
+            ActorAttribute('generation', 2 if n > 4 else 1),
+            ActorAttribute('is_invincible', 'true'),
+            ActorAttribute('speed', '1.4', ['0.0', '1.4', '2.8']),
+            ActorAttribute('role_name', 'pedestrian'),
+        ]))
+    blueprints.append(ActorBlueprint('controller.ai.walker'))
+    return blueprints
+
+
+# ==============================================================================
+# -- actors --------------------------------------------------------------------
+# ==============================================================================
+
+
+class Actor():
+    def __init__(self, world, id, blueprint, transform, parent=None):
+        self._world = world
+        self.id = id
+        self.type_id = blueprint.id
+        self.attributes = {a.id: a.value for a in blueprint}
+        self.parent = parent
+        self.is_alive = True
+        self._transform = _copy_transform(transform)
+        self._velocity = Vector3D()
+        self._acceleration = Vector3D()
+
+    def get_world(self):
+        _rpc()
+        return self._world
+
+    def get_transform(self):
+        _rpc()
+        return _copy_transform(self._transform)
+
+    def get_location(self):
+        _rpc()
+        return _copy_transform(self._transform).location
+
+    def get_velocity(self):
+        _rpc()
+        return Vector3D(self._velocity.x, self._velocity.y, self._velocity.z)
+
+    def get_acceleration(self):
+        _rpc()
+        return Vector3D(self._acceleration.x, self._acceleration.y, self._acceleration.z)
+
+    def destroy(self):
+        _rpc()
+        return self._world._destroy(self.id)
+
+    def _step(self, dt):
+        pass
+
+
+class Vehicle(Actor):
+    def __init__(self, world, id, blueprint, transform, parent=None):
+        super().__init__(world, id, blueprint, transform, parent)
+        self._physics = blueprint._physics or VehiclePhysicsControl()
+        self._control = VehicleControl(gear=1)
+        self._autopilot = False
+        self._speed = 0.0
+        self._target_speed = world._rng.uniform(8.0, 14.0)
+        self._yaw_rate = 0.0
+        self._light_state = VehicleLightState.NONE
+
+    def get_control(self):
+        _rpc()
+        c = self._control
+        return VehicleControl(c.throttle, c.steer, c.brake, c.hand_brake, c.reverse, c.manual_gear_shift, c.gear)
+
+    def apply_control(self, control):
+        _rpc()
+        self._control = control
+
+    def get_physics_control(self):
+        _rpc()
+        return self._physics
+
+    def set_autopilot(self, enabled=True, tm_port=8000):
+        _rpc()
+        self._autopilot = enabled
+
+    def set_light_state(self, light_state):
+        _rpc()
+        self._light_state = light_state
+
+    def get_light_state(self):
+        _rpc()
+        return self._light_state
+
+    def _step(self, dt):
+        # Kinematic autopilot: track a target speed with bounded acceleration
+        # and drift the heading with a slow random walk.
+        if not self._autopilot:
+            return
+        rng = self._world._rng
+        speed_factor = 1.0 - self._world._traffic_manager._speed_difference / 100.0
+        target = self._target_speed * speed_factor
+        accel = max(-6.0, min(3.0, (target - self._speed) / max(dt, 1e-3)))
+        self._speed = max(0.0, self._speed + accel * dt)
+        self._yaw_rate = max(-10.0, min(10.0, self._yaw_rate + rng.uniform(-2.0, 2.0)))
+
+        rotation = self._transform.rotation
+        rotation.yaw = (rotation.yaw + self._yaw_rate * dt) % 360.0
+        forward = rotation.get_forward_vector()
+        old_velocity = self._velocity
+        self._velocity = Vector3D(forward.x * self._speed, forward.y * self._speed, 0.0)
+        self._acceleration = Vector3D((self._velocity.x - old_velocity.x) / dt,
+                                      (self._velocity.y - old_velocity.y) / dt, 0.0)
+        location = self._transform.location
+        location.x += self._velocity.x * dt
+        location.y += self._velocity.y * dt
+
+        gears = len(self._physics.forward_gears)
+        self._control = VehicleControl(
+            throttle=max(0.0, accel / 3.0), steer=self._yaw_rate / 70.0, brake=max(0.0, -accel / 6.0),
+            gear=min(gears, 1 + int(self._speed / 6.0)))
+
+
+class Walker(Actor):
+    def __init__(self, world, id, blueprint, transform, parent=None):
+        super().__init__(world, id, blueprint, transform, parent)
+        self._max_speed = 0.0
+        self._target = None
+
+    def _step(self, dt):
+        if self._target is None or self._max_speed <= 0.0:
+            self._velocity = Vector3D()
+            return
+        location = self._transform.location
+        remaining = self._target - location
+        distance = remaining.length()
+        if distance < 1e-3:
+            self._velocity = Vector3D()
+            return
+        step = min(distance, self._max_speed * dt)
+        self._velocity = Vector3D(remaining.x / distance * self._max_speed, remaining.y / distance * self._max_speed, 0.0)
+        location.x += remaining.x / distance * step
+        location.y += remaining.y / distance * step
+
+
+class WalkerAIController(Actor):
+    def start(self):
+        _rpc()
+        self._walker()._max_speed = 1.4
+
+    def stop(self):
+        _rpc()
+        walker = self._walker()
+        if walker is not None:
+            walker._target = None
+
+    def go_to_location(self, location):
+        _rpc()
+        self._walker()._target = Location(location.x, location.y, location.z)
+
+    def set_max_speed(self, speed=1.4):
+        _rpc()
+        self._walker()._max_speed = speed
+
+    def _walker(self):
+        return self._world._actors.get(self.parent)
+
+
+class ActorList(list):
+    def filter(self, wildcard_pattern):
+        return ActorList(a for a in self if fnmatch.fnmatch(a.type_id, wildcard_pattern))
+
+    def find(self, actor_id):
+        for actor in self:
+            if actor.id == actor_id:
+                return actor
+        return None
+
+
+# ==============================================================================
+# -- snapshots -----------------------------------------------------------------
+# ==============================================================================
+
+
+class Timestamp():
+    def __init__(self, frame, elapsed_seconds, delta_seconds, platform_timestamp):
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = platform_timestamp
+
+
+class ActorSnapshot():
+    def __init__(self, actor):
+        self.id = actor.id
+        self._transform = _copy_transform(actor._transform)
+        self._velocity = Vector3D(actor._velocity.x, actor._velocity.y, actor._velocity.z)
+        self._acceleration = Vector3D(actor._acceleration.x, actor._acceleration.y, actor._acceleration.z)
+
+    def get_transform(self):
+        return self._transform
+
+    def get_velocity(self):
+        return self._velocity
+
+    def get_angular_velocity(self):
+        return Vector3D()
+
+    def get_acceleration(self):
+        return self._acceleration
+
+
+class WorldSnapshot():
+    def __init__(self, world):
+        self.id = world.id
+        self.frame = world._frame
+        self.timestamp = Timestamp(world._frame, world._elapsed, world._last_delta, time.time())
+        self._actors = {id: ActorSnapshot(actor) for id, actor in world._actors.items()}
+
+    def find(self, actor_id):
+        return self._actors.get(actor_id)
+
+    def has_actor(self, actor_id):
+        return actor_id in self._actors
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def __len__(self):
+        return len(self._actors)
+
+
+# ==============================================================================
+# -- world ---------------------------------------------------------------------
+# ==============================================================================
+
+
+class Map():
+    def __init__(self, name, spawn_points):
+        self.name = name
+        self._spawn_points = spawn_points
+
+    def get_spawn_points(self):
+        return [_copy_transform(t) for t in self._spawn_points]
+
+
+class World():
+    # a fixed-step world; the delta is 0.05 s unless fixed_delta_seconds is set
+    default_delta_seconds = 0.05
+
+    def __init__(self, seed=0, number_of_spawn_points=1200):
+        self.id = 1
+        self._rng = random.Random(seed)
+        self._settings = WorldSettings()
+        self._weather = WeatherParameters.ClearNoon
+        self._blueprints = BlueprintLibrary(_default_blueprints())
+        self._actors = {}
+        self._next_id = 100
+        self._frame = 0
+        self._elapsed = 0.0
+        self._last_delta = 0.0
+        self._traffic_manager = TrafficManager(self, 8000)
+        self._snapshot = None
+        # spawn points on a grid of lanes, 10 m apart
+        spawn_points = []
+        side = int(math.ceil(math.sqrt(number_of_spawn_points)))
+        for n in range(number_of_spawn_points):
+            spawn_points.append(Transform(Location(10.0 * (n % side), 10.0 * (n // side), 0.3),
+                                          Rotation(yaw=90.0 * (n % 4))))
+        self._map = Map('Town10HD_Opt', spawn_points)
+
+    def get_settings(self):
+        _rpc()
+        s = self._settings
+        return WorldSettings(s.synchronous_mode, s.no_rendering_mode, s.fixed_delta_seconds)
+
+    def apply_settings(self, settings):
+        _rpc()
+        self._settings = WorldSettings(settings.synchronous_mode, settings.no_rendering_mode,
+                                       settings.fixed_delta_seconds)
+        return self._frame
+
+    def get_weather(self):
+        _rpc()
+        return self._weather
+
+    def set_weather(self, weather):
+        _rpc()
+        self._weather = weather
+
+    def get_blueprint_library(self):
+        _rpc()
+        return self._blueprints
+
+    def get_map(self):
+        _rpc()
+        return self._map
+
+    def get_spectator(self):
+        _rpc()
+        return None
+
+    def get_actors(self, actor_ids=None):
+        _rpc()
+        if actor_ids is None:
+            return ActorList(self._actors.values())
+        return ActorList(self._actors[x] for x in actor_ids if x in self._actors)
+
+    def get_actor(self, actor_id):
+        _rpc()
+        return self._actors.get(actor_id)
+
+    def get_random_location_from_navigation(self):
+        _rpc()
+        return Location(self._rng.uniform(-200.0, 200.0), self._rng.uniform(-200.0, 200.0), 0.5)
+
+    def set_pedestrians_seed(self, seed):
+        _rpc()
+        self._rng.seed(seed)
+
+    def set_pedestrians_cross_factor(self, percentage):
+        _rpc()
+
+    def spawn_actor(self, blueprint, transform, attach_to=None):
+        _rpc()
+        actor = self._spawn(blueprint, transform, attach_to.id if attach_to is not None else None)
+        if isinstance(actor, str):
+            raise RuntimeError(actor)
+        return actor
+
+    def try_spawn_actor(self, blueprint, transform, attach_to=None):
+        _rpc()
+        actor = self._spawn(blueprint, transform, attach_to.id if attach_to is not None else None)
+        return None if isinstance(actor, str) else actor
+
+    def tick(self, seconds=10.0):
+        _rpc()
+        self._advance()
+        return self._frame
+
+    def wait_for_tick(self, seconds=10.0):
+        _rpc()
+        self._advance()
+        return self.get_snapshot()
+
+    def get_snapshot(self):
+        # client-side in the real API, served from the last received episode state
+        if self._snapshot is None or self._snapshot.frame != self._frame:
+            self._snapshot = WorldSnapshot(self)
+        return self._snapshot
+
+    def _advance(self):
+        dt = self._settings.fixed_delta_seconds or self.default_delta_seconds
+        for actor in list(self._actors.values()):
+            actor._step(dt)
+        self._frame += 1
+        self._elapsed += dt
+        self._last_delta = dt
+
+    def _spawn(self, blueprint, transform, parent=None):
+        # returns the actor, or an error string like the batch responses do
+        if blueprint.id.startswith('vehicle.'):
+            location = transform.location
+            for actor in self._actors.values():
+                if isinstance(actor, Vehicle) and actor._transform.location.distance(location) < 2.0:
+                    return 'Spawn failed because of collision at spawn position'
+            actor_class = Vehicle
+        elif blueprint.id.startswith('walker.'):
+            actor_class = Walker
+        elif blueprint.id == 'controller.ai.walker':
+            if parent not in self._actors:
+                return 'parent actor %r not found' % parent
+            actor_class = WalkerAIController
+        else:
+            actor_class = Actor
+        actor = actor_class(self, self._next_id, blueprint, transform, parent)
+        self._next_id += 1
+        self._actors[actor.id] = actor
+        return actor
+
+    def _destroy(self, actor_id):
+        return self._actors.pop(actor_id, None) is not None
+
+
+class TrafficManager():
+    def __init__(self, world, port):
+        self._world = world
+        self._port = port
+        self._synchronous = False
+        self._speed_difference = 30.0
+
+    def get_port(self):
+        return self._port
+
+    def set_global_distance_to_leading_vehicle(self, distance):
+        _rpc()
+
+    def set_respawn_dormant_vehicles(self, enabled):
+        _rpc()
+
+    def set_hybrid_physics_mode(self, enabled):
+        _rpc()
+
+    def set_hybrid_physics_radius(self, radius):
+        _rpc()
+
+    def set_random_device_seed(self, seed):
+        _rpc()
+        self._world._rng.seed(seed)
+
+    def set_synchronous_mode(self, enabled):
+        _rpc()
+        self._synchronous = enabled
+
+    def global_percentage_speed_difference(self, percentage):
+        _rpc()
+        self._speed_difference = percentage
+
+    def update_vehicle_lights(self, actor, enabled):
+        _rpc()
+
+
+class _CommandResponse():
+    def __init__(self, actor_id=0, error=''):
+        self.actor_id = actor_id
+        self.error = error
+
+    def has_error(self):
+        return bool(self.error)
+
+
+# one simulated server per (host, port), shared by every Client connecting to it
+_servers = {}
+
+
+class Client():
+    def __init__(self, host='127.0.0.1', port=2000, worker_threads=0):
+        self.host = host
+        self.port = port
+        self._timeout = 10.0
+        if (host, port) not in _servers:
+            _servers[(host, port)] = World(seed=port)
+        self._world = _servers[(host, port)]
+
+    def set_timeout(self, seconds):
+        self._timeout = seconds
+
+    def get_client_version(self):
+        return __version__
+
+    def get_server_version(self):
+        _rpc()
+        return __version__
+
+    def get_world(self):
+        _rpc()
+        return self._world
+
+    def get_available_maps(self):
+        _rpc()
+        return ['/Game/Carla/Maps/' + self._world._map.name]
+
+    def get_trafficmanager(self, client_connection=8000):
+        _rpc()
+        self._world._traffic_manager._port = client_connection
+        return self._world._traffic_manager
+
+    def apply_batch(self, commands):
+        _rpc()
+        self._apply(commands)
+
+    def apply_batch_sync(self, commands, do_tick=False):
+        _rpc()
+        responses = self._apply(commands)
+        if do_tick:
+            self._world._advance()
+        return responses
+
+    def _apply(self, commands):
+        return [self._execute(c, None) for c in commands]
+
+    def _execute(self, cmd, future_actor_id):
+        world = self._world
+        if isinstance(cmd, command.SpawnActor):
+            parent = cmd.parent_id if cmd.parent_id else None
+            actor = world._spawn(cmd.blueprint, cmd.transform, parent)
+            if isinstance(actor, str):
+                return _CommandResponse(error=actor)
+            for then in cmd.commands:
+                response = self._execute(then, actor.id)
+                if response.error:
+                    return _CommandResponse(actor.id, response.error)
+            return _CommandResponse(actor.id)
+
+        actor_id = getattr(cmd, 'actor_id', 0)
+        if actor_id is command.FutureActor:
+            actor_id = future_actor_id
+        actor = world._actors.get(actor_id)
+        if isinstance(cmd, command.DestroyActor):
+            if not world._destroy(actor_id):
+                return _CommandResponse(actor_id, 'actor %r not found' % actor_id)
+            return _CommandResponse(actor_id)
+        if actor is None:
+            return _CommandResponse(actor_id, 'actor %r not found' % actor_id)
+        if isinstance(cmd, command.SetAutopilot):
+            actor._autopilot = cmd.enabled
+        elif isinstance(cmd, command.ApplyVehicleControl):
+            actor._control = cmd.control
+        elif isinstance(cmd, command.ApplyTransform):
+            actor._transform = _copy_transform(cmd.transform)
+        elif isinstance(cmd, command.SetSimulatePhysics):
+            pass
+        return _CommandResponse(actor_id)
@@ -0,0 +1,52 @@
+"""Batch commands of the headless CARLA stand-in, see carla.command."""
+
+
+class FutureActor():
+    """Placeholder for the id of the actor spawned by the enclosing SpawnActor."""
+
+
+class _Command():
+    def then(self, command):
+        raise RuntimeError('only SpawnActor supports then()')
+
+
+class SpawnActor(_Command):
+    def __init__(self, blueprint, transform, parent_id=0):
+        self.blueprint = blueprint
+        self.transform = transform
+        self.parent_id = parent_id
+        self.commands = []
+
+    def then(self, command):
+        self.commands.append(command)
+        return self
+
+
+class DestroyActor(_Command):
+    def __init__(self, actor):
+        self.actor_id = getattr(actor, 'id', actor)
+
+
+class SetAutopilot(_Command):
+    def __init__(self, actor, enabled, tm_port=8000):
+        self.actor_id = getattr(actor, 'id', actor)
+        self.enabled = enabled
+        self.tm_port = tm_port
+
+
+class ApplyVehicleControl(_Command):
+    def __init__(self, actor, control):
+        self.actor_id = getattr(actor, 'id', actor)
+        self.control = control
+
+
+class ApplyTransform(_Command):
+    def __init__(self, actor, transform):
+        self.actor_id = getattr(actor, 'id', actor)
+        self.transform = transform
+
+
+class SetSimulatePhysics(_Command):
+    def __init__(self, actor, enabled):
+        self.actor_id = getattr(actor, 'id', actor)
+        self.enabled = enabled
@@ -0,0 +1,216 @@
+import numpy as np
+
+# per-sample columns recorded for every vehicle on every tick
+VEHICLE_FIELDS = [
+    ("Time Step", np.int64),
+    ("actor_id", np.int64),
+    ("Vehicle Speed", np.float64),
+    ("Vehicle Acceleration", np.float64),
+    ("Vehicle Throttle", np.float64),
+    ("Vehicle Brake", np.float64),
+    ("Vehicle Steer", np.float64),
+    ("Vehicle Gear", np.int32),
+    ("Vehicle Manual Gear Shift", np.bool_),
+    ("Vehicle Hand Brake", np.bool_),
+    ("accelerometer", np.float64),
+    ("odometer", np.float64),
+    ("fuel_consumption_per_100km", np.float64),
+    ("engine_rpm", np.float64),
+    ("engine_torque", np.float64),
+    ("engine_power", np.float64),
+    ("inclination", np.float64),
+    ("fuel_consumption", np.float64),
+]
+
+# per-actor values that never change during a run, stored once per vehicle
+VEHICLE_STATIC_FIELDS = [
+    "tire friction of tire 1",
+    "max_rpm",
+    "moi",
+    "drag_coefficient",
+    "mass",
+]
+
+
+class TelemetryBuffer():
+    """
+    Columnar store for per-tick vehicle telemetry.
+
+    Every field lives in its own preallocated NumPy array that doubles, in
+    multiples of `chunk_size` rows, when full. Static per-actor data (mass,
+    drag, MOI...) is kept once per actor in `static` rather than repeated in
+    every sample.
+    """
+
+    def __init__(self, fields=VEHICLE_FIELDS, chunk_size=4096):
+        self.chunk_size = chunk_size
+        self.dtypes = dict(fields)
+        self.static = {}
+        self._size = 0
+        self._capacity = chunk_size
+        self._columns = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in fields}
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    @property
+    def fields(self):
+        return list(self._columns)
+
+    def column(self, name):
+        # Zero-copy view of the filled part of a column. Views taken before
+        # the buffer grows keep pointing at the old storage.
+        return self._columns[name][:self._size]
+
+    def columns(self):
+        return {name: self.column(name) for name in self._columns}
+
+    def set_static(self, actor_id, **values):
+        self.static.setdefault(actor_id, {}).update(values)
+
+    def _reserve(self, rows):
+        needed = self._size + rows
+        if needed <= self._capacity:
+            return
+        # doubles so appending stays linear overall, in whole chunks
+        capacity = max(needed, 2 * self._capacity)
+        capacity = -(-capacity // self.chunk_size) * self.chunk_size
+        for name, data in self._columns.items():
+            grown = np.empty(capacity, dtype=data.dtype)
+            grown[:self._size] = data[:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def append(self, **values):
+        self.append_batch({name: [value] for name, value in values.items()})
+
+    def append_batch(self, columns):
+        # Appends one row per element; every field of the buffer must be given.
+        rows = len(next(iter(columns.values()))) if columns else 0
+        if rows == 0:
+            return
+        missing = set(self._columns) - set(columns)
+        if missing:
+            raise ValueError('missing telemetry fields: %s' % ', '.join(sorted(missing)))
+        self._reserve(rows)
+        start, end = self._size, self._size + rows
+        for name, data in self._columns.items():
+            data[start:end] = columns[name]
+        self._size = end
+
+    def to_pandas(self, include_static=False):
+        import pandas as pd
+
+        df = pd.DataFrame(self.columns(), copy=False)
+        if include_static and self.static:
+            static = pd.DataFrame.from_dict(self.static, orient='index')
+            df = df.join(static, on='actor_id')
+        return df
+
+
+class RpcCounter():
+    """Counts simulator round-trips, bucketed per tick."""
+
+    def __init__(self):
+        self.current = 0
+        self.per_tick = []
+
+    def add(self, n=1):
+        self.current += n
+
+    def end_tick(self):
+        self.per_tick.append(self.current)
+        self.current = 0
+
+    @property
+    def last(self):
+        return self.per_tick[-1] if self.per_tick else 0
+
+    @property
+    def mean(self):
+        return sum(self.per_tick) / len(self.per_tick) if self.per_tick else 0.0
+
+
+class TelemetryExtractor():
+    """
+    Reads per-tick vehicle state with as few server round-trips as possible.
+
+    Transform, velocity and acceleration come from the WorldSnapshot returned
+    by the tick, physics control is fetched once per blueprint when its first
+    actor is registered, and the only per-vehicle call left each tick is
+    get_control().
+    """
+
+    def __init__(self, world, rpc_counter=None):
+        self.world = world
+        self.rpc = rpc_counter or RpcCounter()
+        self.physics = {}
+        self.blueprint_physics = {}
+        self.actors = {}
+
+    def register(self, actor):
+        # physics control is fixed per blueprint, so it is only fetched for new ones
+        if actor.id not in self.physics:
+            physics = self.blueprint_physics.get(actor.type_id)
+            if physics is None:
+                physics = actor.get_physics_control()
+                self.rpc.add()
+                self.blueprint_physics[actor.type_id] = physics
+            self.physics[actor.id] = physics
+            self.actors[actor.id] = actor
+        return self.physics[actor.id]
+
+    def register_all(self, actor_ids):
+        actors = self.world.get_actors(actor_ids)
+        self.rpc.add()
+        for actor in actors:
+            self.register(actor)
+
+    def tick(self, synchronous=True):
+        if synchronous:
+            self.world.tick()
+        else:
+            self.world.wait_for_tick()
+        self.rpc.add()
+        return self.world.get_snapshot()
+
+    def extract(self, snapshot):
+        """
+        Returns a dict of per-vehicle arrays for every registered actor still
+        present in `snapshot`, ordered like the "actor_id" entry.
+        """
+        ids = []
+        location = []
+        velocity = []
+        acceleration = []
+        pitch = []
+        controls = []
+        for actor_id, actor in self.actors.items():
+            actor_snapshot = snapshot.find(actor_id)
+            if actor_snapshot is None:
+                continue
+            transform = actor_snapshot.get_transform()
+            ids.append(actor_id)
+            location.append((transform.location.x, transform.location.y, transform.location.z))
+            pitch.append(transform.rotation.pitch)
+            velocity.append(actor_snapshot.get_velocity().length())
+            acceleration.append(actor_snapshot.get_acceleration().length())
+            controls.append(actor.get_control())
+        self.rpc.add(len(controls))
+
+        return {
+            "actor_id": np.array(ids, dtype=np.int64),
+            "location": np.array(location, dtype=np.float64).reshape(-1, 3),
+            "speed": np.array(velocity, dtype=np.float64),
+            "acceleration": np.array(acceleration, dtype=np.float64),
+            "pitch": np.array(pitch, dtype=np.float64),
+            "throttle": np.array([c.throttle for c in controls], dtype=np.float64),
+            "brake": np.array([c.brake for c in controls], dtype=np.float64),
+            "steer": np.array([c.steer for c in controls], dtype=np.float64),
+            "gear": np.array([c.gear for c in controls], dtype=np.int32),
+            "manual_gear_shift": np.array([c.manual_gear_shift for c in controls], dtype=np.bool_),
+            "hand_brake": np.array([c.hand_brake for c in controls], dtype=np.bool_),
+        }
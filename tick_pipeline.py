@@ -0,0 +1,146 @@
+import threading
+import time
+import queue
+
+
+class TickPipeline():
+    """
+    Overlaps per-tick processing with the next simulator tick.
+
+    The main thread keeps ticking the world and submits each frame's
+    extracted state; a single worker thread processes frames first-in
+    first-out, so they are always handled in frame order. At most `depth`
+    frames are in flight (queued or being processed); submit() blocks when
+    that limit is reached. With depth 0 frames are processed inline.
+
+    The time saved is measured, not inferred: the last `calibrate_ticks` of
+    every `calibrate_every` frames are processed inline after draining the
+    worker, and the wall time between submits in those serial windows is
+    compared with the pipelined ticks. Busy time of the two threads would not
+    do, as they compete for the GIL and pipelining slows both down.
+    """
+
+    def __init__(self, process, depth=1, calibrate_every=100, calibrate_ticks=10):
+        self.process = process
+        self.depth = depth
+        self.calibrate_every = calibrate_every
+        self.calibrate_ticks = calibrate_ticks
+        self.frames = 0
+        self.submitted = 0
+        self.last_frame = None
+        # time spent processing, and time the main thread waited on the worker
+        self.process_seconds = 0.0
+        self.wait_seconds = 0.0
+        # wall time between consecutive submits of the same mode, keyed by serial
+        self.tick_seconds = {True: 0.0, False: 0.0}
+        self.tick_intervals = {True: 0, False: 0}
+        self.pipelined_frames = 0
+        self._last_submit = None
+        self.error = None
+        if depth > 0:
+            self.slots = threading.BoundedSemaphore(depth)
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self._run, name='tick-pipeline', daemon=True)
+            self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def calibrated(self):
+        # True once both serial and pipelined ticks have been timed
+        return self.depth > 0 and self.tick_intervals[True] > 0 and self.tick_intervals[False] > 0
+
+    def mean_tick_seconds(self, serial):
+        intervals = self.tick_intervals[serial]
+        return self.tick_seconds[serial] / intervals if intervals else 0.0
+
+    @property
+    def saved_seconds_per_tick(self):
+        # wall time per tick, serial minus pipelined; negative when pipelining hurts
+        if not self.calibrated:
+            return 0.0
+        return self.mean_tick_seconds(True) - self.mean_tick_seconds(False)
+
+    @property
+    def saved_seconds(self):
+        return self.saved_seconds_per_tick * self.pipelined_frames
+
+    def _serial(self, n):
+        if self.depth == 0:
+            return True
+        if self.calibrate_every <= 0:
+            return False
+        return n % self.calibrate_every >= self.calibrate_every - self.calibrate_ticks
+
+    def _lap(self, serial):
+        # intervals that switch mode include a drain or a refill, they are not counted
+        now = time.perf_counter()
+        if self._last_submit is not None and self._last_submit[1] == serial:
+            self.tick_seconds[serial] += now - self._last_submit[0]
+            self.tick_intervals[serial] += 1
+        self._last_submit = (now, serial)
+
+    def _handle(self, frame, args):
+        if self.last_frame is not None and frame <= self.last_frame:
+            raise RuntimeError('frame %d delivered after frame %d' % (frame, self.last_frame))
+        self.last_frame = frame
+        start = time.perf_counter()
+        self.process(frame, *args)
+        self.process_seconds += time.perf_counter() - start
+        self.frames += 1
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                if self.error is None:
+                    self._handle(*item)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.slots.release()
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError('tick processing failed: %s' % self.error) from self.error
+
+    def submit(self, frame, *args):
+        self._check()
+        serial = self._serial(self.submitted)
+        self.submitted += 1
+        if serial:
+            self.drain()
+            self._handle(frame, args)
+        else:
+            start = time.perf_counter()
+            self.slots.acquire()
+            self.wait_seconds += time.perf_counter() - start
+            self.queue.put((frame, args))
+            self.pipelined_frames += 1
+        self._lap(serial)
+
+    def drain(self):
+        # waits until every submitted frame has been processed
+        if self.depth == 0:
+            return
+        start = time.perf_counter()
+        for _ in range(self.depth):
+            self.slots.acquire()
+        for _ in range(self.depth):
+            self.slots.release()
+        self.wait_seconds += time.perf_counter() - start
+        self._check()
+
+    def close(self):
+        if self.depth > 0 and self.thread.is_alive():
+            start = time.perf_counter()
+            self.queue.put(None)
+            self.thread.join()
+            self.wait_seconds += time.perf_counter() - start
+        self._check()
@@ -1,17 +1,24 @@
 import random
 
+import numpy as np
+
 
 def calculate_pressure(initial_pressure: float, uptime: int, stopped_for: int):
+    return float(calculate_pressure_array(initial_pressure, uptime, stopped_for))
+
+
+def calculate_pressure_array(initial_pressure, uptime, stopped_for):
     # pressure is in psi
     # uptime is in seconds
     # tire pressure increases by 1 psi for every 5 minutes, for 20 minutes. then it stays constant
     # tire pressure decreases by 1 psi for every 5 minutes of stopping, for 20 minutes. then it stays constant
-    if uptime <= 1200:
-        return initial_pressure + uptime / 300 - stopped_for / 300
-    else:
-        if stopped_for >= 1200:
-            return initial_pressure
-        return initial_pressure + 4 - stopped_for / 300
+    # all arguments may be fleet arrays, they are broadcast together
+    initial_pressure = np.asarray(initial_pressure, dtype=np.float64)
+    uptime = np.asarray(uptime, dtype=np.float64)
+    stopped_for = np.asarray(stopped_for, dtype=np.float64)
+    warm = np.where(uptime <= 1200, uptime / 300, 4.0)
+    pressure = initial_pressure + warm - stopped_for / 300
+    return np.where((uptime > 1200) & (stopped_for >= 1200), initial_pressure, pressure)
 
 
 def is_seatbelt(uptime: int, stopped_for: int):
@@ -36,12 +43,19 @@ def get_vehicle_inclination(rotation):
 
 def calculate_engine_rpm(current_gear: int, gear_ratio: float, final_drive_ratio: float,
                          current_speed: float, rolling_radius: float):
+    return float(calculate_engine_rpm_array(current_gear, gear_ratio, final_drive_ratio,
+                                            current_speed, rolling_radius))
+
+
+def calculate_engine_rpm_array(current_gear, gear_ratio, final_drive_ratio, current_speed, rolling_radius):
     # current speed in m/s
     # rolling radius in meters
-    rpm = (current_speed*60) / (2 * 3.14 * rolling_radius)
-    if current_gear > 0:
-        rpm = rpm * gear_ratio * final_drive_ratio
-    return rpm
+    # all arguments may be fleet arrays, vehicles in neutral or reverse (gear <= 0)
+    # report the wheel rpm
+    current_speed = np.asarray(current_speed, dtype=np.float64)
+    rpm = (current_speed*60) / (2 * 3.14 * np.asarray(rolling_radius, dtype=np.float64))
+    ratio = np.asarray(gear_ratio, dtype=np.float64) * np.asarray(final_drive_ratio, dtype=np.float64)
+    return np.where(np.asarray(current_gear) > 0, rpm * ratio, rpm)
 
 
 #
@@ -49,7 +63,17 @@ def calculate_engine_rpm(current_gear: int, gear_ratio: float, final_drive_ratio
 #     return (max_rpm * throttle) / (final_ratio * gear_ratio)
 
 def calculate_fuel_consumption(mass_vehicle, acceleration, speed, rpm, distance, drag_coefficient, moment_of_inertia):
-    fuel_consumption = (mass_vehicle * acceleration * speed / rpm) * distance
+    return float(calculate_fuel_consumption_array(mass_vehicle, acceleration, speed, rpm, distance,
+                                                  drag_coefficient, moment_of_inertia))
+
+
+def calculate_fuel_consumption_array(mass_vehicle, acceleration, speed, rpm, distance, drag_coefficient,
+                                     moment_of_inertia):
+    # all arguments may be fleet arrays; the load term is 0 for a stopped engine (rpm == 0)
+    speed = np.asarray(speed, dtype=np.float64)
+    rpm = np.asarray(rpm, dtype=np.float64)
+    load = np.asarray(mass_vehicle, dtype=np.float64) * acceleration * speed
+    fuel_consumption = np.divide(load, rpm, out=np.zeros(np.broadcast(load, rpm).shape), where=rpm != 0) * distance
     fuel_consumption += drag_coefficient * speed**3
-    fuel_consumption += 0.5 * moment_of_inertia * speed**2
-    return 0.0001*fuel_consumption
\ No newline at end of file
+    fuel_consumption += 0.5 * np.asarray(moment_of_inertia, dtype=np.float64) * speed**2
+    return 0.0001*fuel_consumption
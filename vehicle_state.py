@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class VehicleStateRegistry():
+    """
+    Per-vehicle running state (odometer, fuel used, last position) keyed by actor id.
+
+    State is kept as struct-of-arrays so a whole fleet is updated with one
+    vectorized distance computation per tick; `index` maps an actor id to its row.
+    """
+
+    def __init__(self, capacity=64):
+        self.index = {}
+        self.actor_ids = np.empty(capacity, dtype=np.int64)
+        self.odometer = np.zeros(capacity, dtype=np.float64)
+        self.fuel_consumption = np.zeros(capacity, dtype=np.float64)
+        self.previous_location = np.zeros((capacity, 3), dtype=np.float64)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, actor_id):
+        return actor_id in self.index
+
+    def _grow(self, capacity):
+        size = len(self.index)
+        for name in ('actor_ids', 'odometer', 'fuel_consumption', 'previous_location'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:size] = old[:size]
+            setattr(self, name, new)
+
+    def register(self, actor_id, location):
+        # location is anything with x, y, z (carla.Location) or a 3-sequence;
+        # registering a known actor again only moves its previous location
+        if actor_id in self.index:
+            row = self.index[actor_id]
+            self.previous_location[row] = _as_xyz(location)
+            return row
+        row = len(self.index)
+        if row == len(self.actor_ids):
+            self._grow(2 * row)
+        self.index[actor_id] = row
+        self.actor_ids[row] = actor_id
+        self.previous_location[row] = _as_xyz(location)
+        return row
+
+    def rows(self, actor_ids):
+        return np.fromiter((self.index[x] for x in actor_ids), dtype=np.intp, count=len(actor_ids))
+
+    def update_locations(self, actor_ids, locations):
+        """
+        Adds the distance covered since the previous call to each vehicle's
+        odometer and returns those per-vehicle distances.
+
+        `locations` is an (N, 3) array in the order of `actor_ids`.
+        """
+        rows = self.rows(actor_ids)
+        locations = np.asarray(locations, dtype=np.float64).reshape(-1, 3)
+        distance = np.linalg.norm(locations - self.previous_location[rows], axis=1)
+        self.odometer[rows] += distance
+        self.previous_location[rows] = locations
+        return distance
+
+    def add_fuel_consumption(self, actor_ids, fuel_consumption):
+        self.fuel_consumption[self.rows(actor_ids)] += fuel_consumption
+
+    def get_odometer(self, actor_ids):
+        return self.odometer[self.rows(actor_ids)]
+
+    def get_fuel_consumption(self, actor_ids):
+        return self.fuel_consumption[self.rows(actor_ids)]
+
+
+def _as_xyz(location):
+    if hasattr(location, 'x'):
+        return (location.x, location.y, location.z)
+    return tuple(location)